@@ -0,0 +1,158 @@
+"""
+Memoized Gemini resume analyses
+
+Results are stored in analysis_cache keyed by (resume content hash, drive id,
+job description hash, prompt version), so repeated "analyze for this drive"
+clicks are answered from the database instead of Gemini. Entries expire after
+ANALYSIS_CACHE_TTL seconds and the least recently used rows are evicted once
+the table grows past ANALYSIS_CACHE_MAX_ROWS.
+
+A new resume has a new content hash and an edited drive has a new description
+hash, so stale entries are never hit. invalidate_resume() removes a student's
+replaced resume eagerly; entries of a deleted drive go with it (ON DELETE
+CASCADE, migration 014).
+"""
+import hashlib
+import json
+import os
+import random
+
+from database import db
+from gemini_ai import GEMINI_API_KEY, PROMPT_VERSION, analyze_resume, analyze_resumes_batch
+from skills import local_analysis
+from resume_texts import ensure_content_hash, get_resume_text
+
+ANALYSIS_CACHE_TTL = int(os.getenv('ANALYSIS_CACHE_TTL', 7 * 24 * 3600))
+ANALYSIS_CACHE_MAX_ROWS = int(os.getenv('ANALYSIS_CACHE_MAX_ROWS', 20000))
+# last_used_at only drives LRU eviction, so a hit refreshes it at most this often
+ANALYSIS_CACHE_TOUCH_INTERVAL = int(os.getenv('ANALYSIS_CACHE_TOUCH_INTERVAL', 600))
+
+# Fraction of writes that also run eviction, so it costs nothing on most requests
+EVICTION_PROBABILITY = 0.05
+
+
+def make_key(resume_hash, drive_id, job_role, job_description):
+    description_hash = hashlib.sha256(f"{job_role}\n{job_description or ''}".encode('utf-8')).hexdigest()
+    raw = f"{resume_hash}:{drive_id or 'general'}:{description_hash}:v{PROMPT_VERSION}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def get(cache_key):
+    """
+    Cached analysis or None
+
+    Most hits are a plain read (replica-safe); only a row not touched for
+    ANALYSIS_CACHE_TOUCH_INTERVAL seconds gets its last_used_at refreshed.
+    """
+    row = db.execute_query(
+        """SELECT result, last_used_at < NOW() - INTERVAL %s SECOND as needs_touch
+           FROM analysis_cache WHERE cache_key = %s AND expires_at > NOW()""",
+        (ANALYSIS_CACHE_TOUCH_INTERVAL, cache_key),
+        fetch_one=True
+    )
+    if not row:
+        return None
+    if row['needs_touch']:
+        db.execute_query(
+            "UPDATE analysis_cache SET last_used_at = NOW() WHERE cache_key = %s",
+            (cache_key,)
+        )
+    return json.loads(row['result'])
+
+
+def put(cache_key, resume_hash, drive_id, result):
+    db.execute_query(
+        """INSERT INTO analysis_cache (cache_key, resume_hash, drive_id, result, expires_at)
+           VALUES (%s, %s, %s, %s, NOW() + INTERVAL %s SECOND)
+           ON DUPLICATE KEY UPDATE result = VALUES(result), expires_at = VALUES(expires_at), last_used_at = NOW()""",
+        (cache_key, resume_hash, drive_id, json.dumps(result), ANALYSIS_CACHE_TTL)
+    )
+    if random.random() < EVICTION_PROBABILITY:
+        evict()
+
+
+def evict():
+    """Drop expired rows, then the least recently used rows above the size cap"""
+    db.execute_query("DELETE FROM analysis_cache WHERE expires_at <= NOW()")
+    row = db.execute_query("SELECT COUNT(*) as count FROM analysis_cache", fetch_one=True)
+    excess = (row['count'] if row else 0) - ANALYSIS_CACHE_MAX_ROWS
+    if excess > 0:
+        db.execute_query(
+            "DELETE FROM analysis_cache ORDER BY last_used_at ASC LIMIT %s",
+            (excess,)
+        )
+
+
+def invalidate_resume(resume_hash, user_id):
+    """Drop analyses of a file user_id replaced, unless another student has the same file"""
+    return db.execute_query(
+        """DELETE FROM analysis_cache
+           WHERE resume_hash = %s
+             AND NOT EXISTS (SELECT 1 FROM resumes WHERE content_hash = %s AND user_id <> %s)""",
+        (resume_hash, resume_hash, user_id)
+    )
+
+
+def cached_analysis(resume, job_role, job_description='', drive_id=None, raise_errors=False):
+    """
+    analyze_resume() for a resumes row, with memoization
+
+    On a hit neither the resume text nor Gemini is touched. When Gemini is not
+    configured or fails, the offline local_analysis() is returned but never
+    cached, so the next call tries Gemini again.
+    """
+    resume_hash = ensure_content_hash(resume)
+    cache_key = make_key(resume_hash, drive_id, job_role, job_description)
+    cached = get(cache_key)
+    if cached is not None:
+        return cached
+
+    resume_text = get_resume_text(resume)
+    if not GEMINI_API_KEY:
+        return analyze_resume(resume_text, job_role, job_description)
+
+    try:
+        result = analyze_resume(resume_text, job_role, job_description, raise_errors=True)
+    except Exception as e:
+        if raise_errors:
+            raise
+        print(f"⚠️ Gemini analysis failed, using local analysis: {e}")
+        return local_analysis(resume_text, job_role, job_description)
+
+    put(cache_key, resume_hash, drive_id, result)
+    return result
+
+
+def cached_analyses(resumes, job_role, job_description='', drive_id=None):
+    """
+    cached_analysis() for many resumes rows against the same role
+
+    Cache misses are sent to Gemini in batched prompts (analyze_resumes_batch)
+    instead of one call each.
+
+    Returns:
+        dict resume id -> analysis
+    """
+    results = {}
+    misses = []
+    for resume in resumes:
+        resume_hash = ensure_content_hash(resume)
+        cache_key = make_key(resume_hash, drive_id, job_role, job_description)
+        cached = get(cache_key)
+        if cached is not None:
+            results[resume['id']] = cached
+        else:
+            misses.append((resume, resume_hash, cache_key))
+
+    if not misses:
+        return results
+
+    texts = [(resume['id'], get_resume_text(resume)) for resume, _, _ in misses]
+    analyses = analyze_resumes_batch(texts, job_role, job_description)
+    for resume, resume_hash, cache_key in misses:
+        result = analyses[resume['id']]
+        results[resume['id']] = result
+        # Local fallbacks are not cached so the next call tries Gemini again
+        if result.get('source') != 'local':
+            put(cache_key, resume_hash, drive_id, result)
+    return results
@@ -1,20 +1,15 @@
 """
 Main Flask application for College Placement Management Portal
 """
-from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, send_file
+from flask import Flask, render_template, request, redirect, url_for, session, flash, jsonify, Response, stream_with_context
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
 import os
 from pathlib import Path
-from datetime import datetime, date
+from datetime import datetime
 import json
+import time
 from functools import wraps
-import PyPDF2
-from docx import Document
-import openpyxl
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from io import BytesIO
 
 import sys
 from pathlib import Path
@@ -24,8 +19,24 @@ backend_dir = Path(__file__).parent
 sys.path.insert(0, str(backend_dir))
 
 from database import db
-from gemini_ai import analyze_resume, generate_email_content
+from gemini_ai import generate_email_content
+from gemini_client import client as gemini_client
 from mail_utils import init_mail, send_application_update_email
+import mail_outbox
+import bulk_status
+import reports
+import report_cache
+import pdf_reports
+from query_profiler import init_query_profiler
+import stats_service
+from cache import cache, ACTIVE_DRIVES_KEY, TPO_STATS_KEY, hod_stats_key
+from pagination import InvalidCursor, decode_cursor, parse_limit, keyset_condition, keyset_params, build_page
+from resume_parser import file_hash
+import analysis_cache
+from ranking import rank_applicants, deep_review
+import search_index
+from jobs import enqueue, start_workers
+import tasks  # registers background job handlers
 
 app = Flask(__name__, template_folder='../frontend/templates', static_folder='../frontend/static')
 app.secret_key = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -34,6 +45,7 @@ app.secret_key = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'frontend', 'static', 'uploads')
 ALLOWED_EXTENSIONS = {'pdf', 'docx', 'doc'}
 MAX_UPLOAD_SIZE = int(os.getenv('MAX_UPLOAD_SIZE', 16777216))  # 16MB
+MAX_DEEP_REVIEW = int(os.getenv('MAX_DEEP_REVIEW', 20))  # applicants sent to Gemini per ranking
 
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(os.path.join(UPLOAD_FOLDER, 'resumes'), exist_ok=True)
@@ -41,32 +53,38 @@ os.makedirs(os.path.join(UPLOAD_FOLDER, 'offers'), exist_ok=True)
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
-# Initialize mail
+# Initialize mail; emails are queued in the outbox and sent by a background thread
 init_mail(app)
 
+# Per-request query stats, slow-query log and Server-Timing header
+init_query_profiler(app, db)
+
+def init_background(app):
+    """
+    Start this process's background threads: outbox sender, job workers
+    (resume analysis, report refresh) and the report refresh schedule
+
+    Called from the __main__ block and gunicorn's post_worker_init hook, never
+    at import time: spawned extraction/PDF workers re-import this module and
+    must not claim jobs or mail.
+    """
+    mail_outbox.start_sender(app)
+    start_workers()
+    if report_cache.REPORT_CACHE:
+        try:
+            report_cache.schedule_refresh()
+        except Exception as e:
+            print(f"⚠️ Could not schedule report refresh: {e}")
+
+@app.teardown_appcontext
+def release_db_connection(error=None):
+    """Return the request's database connection to the pool"""
+    db.release(discard=error is not None)
+
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def extract_text_from_file(file_path):
-    """Extract text from PDF or DOCX file"""
-    try:
-        if file_path.endswith('.pdf'):
-            with open(file_path, 'rb') as f:
-                pdf_reader = PyPDF2.PdfReader(f)
-                text = ''
-                for page in pdf_reader.pages:
-                    text += page.extract_text()
-                return text
-        elif file_path.endswith('.docx') or file_path.endswith('.doc'):
-            doc = Document(file_path)
-            text = '\n'.join([para.text for para in doc.paragraphs])
-            return text
-    except Exception as e:
-        print(f"Error extracting text: {e}")
-        return ""
-    return ""
-
 def login_required(f):
     """Decorator for routes that require login"""
     @wraps(f)
@@ -130,10 +148,16 @@ def register():
         password_hash = generate_password_hash(password)
         is_approved = True if role == 'tpo' else False
         
-        db.execute_query(
-            "INSERT INTO users (name, email, password_hash, role, department, is_approved) VALUES (%s, %s, %s, %s, %s, %s)",
-            (name, email, password_hash, role, department, is_approved)
-        )
+        with db.transaction():
+            db.execute_query(
+                "INSERT INTO users (name, email, password_hash, role, department, is_approved) VALUES (%s, %s, %s, %s, %s, %s)",
+                (name, email, password_hash, role, department, is_approved)
+            )
+            if role == 'student':
+                stats_service.record_student_registered(department)
+        
+        if role == 'student':
+            cache.delete(TPO_STATS_KEY, hod_stats_key(department))
         
         flash('Registration successful! Please log in.', 'success')
         return redirect(url_for('index'))
@@ -211,11 +235,11 @@ def student_dashboard():
         fetch_one=True
     )
     
-    # Get active drives
-    drives = db.execute_query(
+    # Get active drives (identical for every student, so served from the cache)
+    drives = cache.get_or_set(ACTIVE_DRIVES_KEY, lambda: db.execute_query(
         "SELECT * FROM drives WHERE status = 'active' AND last_date >= CURDATE() ORDER BY last_date ASC",
         fetch_all=True
-    )
+    ))
     
     # Get applications
     applications = db.execute_query(
@@ -253,7 +277,7 @@ def student_dashboard():
 @login_required
 @role_required('student')
 def upload_resume():
-    """Upload and analyze resume"""
+    """Upload resume and queue it for analysis"""
     if 'resume' not in request.files:
         flash('No file selected.', 'error')
         return redirect(url_for('student_dashboard'))
@@ -280,29 +304,52 @@ def upload_resume():
     filename = secure_filename(f"{session['user_id']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{file.filename}")
     file_path = os.path.join(app.config['UPLOAD_FOLDER'], 'resumes', filename)
     file.save(file_path)
+    content_hash = file_hash(file_path)
     
-    # Extract text
-    resume_text = extract_text_from_file(file_path)
-    
-    if not resume_text:
-        flash('Could not extract text from resume. Please ensure the file is not corrupted.', 'error')
-        return redirect(url_for('student_dashboard'))
-    
-    # Analyze with Gemini (basic analysis for now)
-    analysis = analyze_resume(resume_text, "General")
-    
-    # Save to database
-    job_fit_score = analysis.get('job_fit_score', 0)
-    feedback = json.dumps(analysis)
-    
-    db.execute_query(
-        "INSERT INTO resumes (user_id, file_path, original_filename, job_fit_score, feedback) VALUES (%s, %s, %s, %s, %s)",
-        (session['user_id'], file_path, file.filename, job_fit_score, feedback)
+    # Cached analyses of the student's previous resumes no longer apply
+    previous = db.execute_query(
+        "SELECT DISTINCT content_hash FROM resumes WHERE user_id = %s AND content_hash IS NOT NULL",
+        (session['user_id'],),
+        fetch_all=True
     )
+    for row in previous or []:
+        if row['content_hash'] != content_hash:
+            analysis_cache.invalidate_resume(row['content_hash'], session['user_id'])
+    
+    # Save to database; text extraction and Gemini analysis run in the background
+    with db.transaction():
+        resume_id = db.insert(
+            "INSERT INTO resumes (user_id, file_path, original_filename, content_hash, analysis_status) VALUES (%s, %s, %s, %s, 'pending')",
+            (session['user_id'], file_path, file.filename, content_hash)
+        )
+        # The previous resume stays out of TPO search until this one is analyzed
+        search_index.unindex_resume(session['user_id'], resume_id)
+        enqueue('analyze_resume', {'resume_id': resume_id})
     
-    flash('Resume uploaded and analyzed successfully!', 'success')
+    flash('Resume uploaded! Analysis is in progress.', 'success')
     return redirect(url_for('student_dashboard'))
 
+@app.route('/student/resume_status')
+@login_required
+@role_required('student')
+def resume_status():
+    """Analysis status of the latest resume (polled by the dashboard)"""
+    resume = db.execute_query(
+        "SELECT id, analysis_status, job_fit_score, feedback FROM resumes WHERE user_id = %s ORDER BY analyzed_at DESC LIMIT 1",
+        (session['user_id'],),
+        fetch_one=True
+    )
+    
+    if not resume:
+        return jsonify({'error': 'No resume found'}), 404
+    
+    return jsonify({
+        'id': resume['id'],
+        'status': resume['analysis_status'],
+        'job_fit_score': resume['job_fit_score'],
+        'analysis': json.loads(resume['feedback']) if resume['feedback'] else None
+    })
+
 @app.route('/student/apply/<int:drive_id>', methods=['POST'])
 @login_required
 @role_required('student')
@@ -332,23 +379,31 @@ def apply_drive(drive_id):
         flash('Please upload your resume before applying.', 'error')
         return redirect(url_for('student_dashboard'))
     
-    # Create application
-    db.execute_query(
-        "INSERT INTO applications (student_id, drive_id, status) VALUES (%s, %s, %s)",
-        (user_id, drive_id, 'Applied')
-    )
-    
-    # Create notification
     drive = db.execute_query(
         "SELECT company_name, job_role FROM drives WHERE id = %s",
         (drive_id,),
         fetch_one=True
     )
     
-    db.execute_query(
-        "INSERT INTO notifications (user_id, message, type) VALUES (%s, %s, %s)",
-        (user_id, f"Application submitted for {drive['company_name']} - {drive['job_role']}", 'success')
-    )
+    if not drive:
+        flash('Drive not found.', 'error')
+        return redirect(url_for('student_dashboard'))
+    
+    # Create application and notification in one commit
+    with db.transaction():
+        db.execute_query(
+            "INSERT INTO applications (student_id, drive_id, status) VALUES (%s, %s, %s)",
+            (user_id, drive_id, 'Applied')
+        )
+        
+        db.execute_query(
+            "INSERT INTO notifications (user_id, message, type) VALUES (%s, %s, %s)",
+            (user_id, f"Application submitted for {drive['company_name']} - {drive['job_role']}", 'success')
+        )
+        
+        stats_service.record_application_created()
+    
+    cache.delete(TPO_STATS_KEY)
     
     flash('Application submitted successfully!', 'success')
     return redirect(url_for('student_dashboard'))
@@ -380,11 +435,10 @@ def resume_analysis(drive_id):
     if not drive:
         return jsonify({'error': 'Drive not found'}), 404
     
-    # Extract resume text
-    resume_text = extract_text_from_file(resume['file_path'])
-    
-    # Analyze with Gemini for this specific job
-    analysis = analyze_resume(resume_text, drive['job_role'], drive.get('job_description', ''))
+    # Analyze with Gemini for this specific job; repeat requests are served from the cache
+    analysis = analysis_cache.cached_analysis(
+        resume, drive['job_role'], drive.get('job_description', ''), drive_id=drive_id
+    )
     
     return jsonify(analysis)
 
@@ -405,17 +459,7 @@ def hod_dashboard():
     )
     
     # Get department statistics
-    total_students = db.execute_query(
-        "SELECT COUNT(*) as count FROM users WHERE role = 'student' AND department = %s",
-        (department,),
-        fetch_one=True
-    )
-    
-    approved_students = db.execute_query(
-        "SELECT COUNT(*) as count FROM users WHERE role = 'student' AND department = %s AND is_approved = TRUE",
-        (department,),
-        fetch_one=True
-    )
+    stats = cache.get_or_set(hod_stats_key(department), lambda: stats_service.get_hod_stats(department))
     
     # Get department applications
     applications = db.execute_query(
@@ -432,8 +476,8 @@ def hod_dashboard():
     
     return render_template('hod_dashboard.html',
                          pending_students=pending_students or [],
-                         total_students=total_students['count'] if total_students else 0,
-                         approved_students=approved_students['count'] if approved_students else 0,
+                         total_students=stats['total_students'],
+                         approved_students=stats['approved_students'],
                          applications=applications or [])
 
 @app.route('/hod/approve_student/<int:student_id>', methods=['POST'])
@@ -441,22 +485,26 @@ def hod_dashboard():
 @role_required('hod')
 def approve_student(student_id):
     """Approve a student"""
-    db.execute_query(
-        "UPDATE users SET is_approved = TRUE WHERE id = %s AND role = 'student'",
-        (student_id,)
-    )
-    
-    # Create notification
-    student = db.execute_query(
-        "SELECT name FROM users WHERE id = %s",
-        (student_id,),
-        fetch_one=True
-    )
+    with db.transaction():
+        student = db.execute_query(
+            "SELECT department FROM users WHERE id = %s AND role = 'student'",
+            (student_id,),
+            fetch_one=True
+        )
+        updated = db.execute_query(
+            "UPDATE users SET is_approved = TRUE WHERE id = %s AND role = 'student'",
+            (student_id,)
+        )
+        
+        # Create notification
+        if updated:
+            db.execute_query(
+                "INSERT INTO notifications (user_id, message, type) VALUES (%s, %s, %s)",
+                (student_id, "Your account has been approved by HOD. You can now access all features.", 'success')
+            )
+            stats_service.record_student_approved(student['department'])
     
-    db.execute_query(
-        "INSERT INTO notifications (user_id, message, type) VALUES (%s, %s, %s)",
-        (student_id, "Your account has been approved by HOD. You can now access all features.", 'success')
-    )
+    cache.delete(hod_stats_key(student['department'] if student else session.get('department', '')))
     
     flash('Student approved successfully.', 'success')
     return redirect(url_for('hod_dashboard'))
@@ -466,10 +514,11 @@ def approve_student(student_id):
 @role_required('hod')
 def reject_student(student_id):
     """Reject a student (delete account)"""
-    db.execute_query(
-        "DELETE FROM users WHERE id = %s AND role = 'student'",
-        (student_id,)
-    )
+    with db.transaction():
+        if stats_service.remove_student(student_id):
+            report_cache.record_deletion()
+    
+    cache.delete(TPO_STATS_KEY, hod_stats_key(session.get('department', '')))
     
     flash('Student account removed.', 'info')
     return redirect(url_for('hod_dashboard'))
@@ -478,47 +527,37 @@ def reject_student(student_id):
 @login_required
 @role_required('hod')
 def export_hod_report():
-    """Export department report as Excel"""
+    """Export department report as Excel, CSV, Parquet or Arrow (?format=, optional ?sheet=)"""
     department = session.get('department', '')
     
-    # Get all students and their applications
-    students = db.execute_query(
-        """SELECT u.*, 
-                  COUNT(DISTINCT a.id) as total_applications,
-                  COUNT(DISTINCT CASE WHEN a.status = 'Selected' THEN a.id END) as selected_count
-           FROM users u
-           LEFT JOIN applications a ON u.id = a.student_id
-           WHERE u.role = 'student' AND u.department = %s
-           GROUP BY u.id""",
-        (department,),
-        fetch_all=True
+    # Served from the report cache until the placement data changes
+    try:
+        return report_cache.export_response('hod', department, request.args.get('format'), request.args.get('sheet'))
+    except reports.ReportError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('hod_dashboard'))
+
+@app.route('/hod/export_pdf')
+@login_required
+@role_required('hod')
+def export_hod_pdf():
+    """Department summary and placement certificates as a zip of PDFs"""
+    department = session.get('department', '')
+    include = request.args.get('include', 'all')
+    chunks = pdf_reports.generate_zip(
+        department=department,
+        certificates=include in ('all', 'certificates'),
+        summaries=include in ('all', 'summaries')
     )
+    try:
+        next(chunks)
+    except pdf_reports.PdfBusy as e:
+        flash(str(e), 'error')
+        return redirect(url_for('hod_dashboard'))
     
-    # Create Excel file
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Department Report"
-    
-    # Headers
-    ws.append(['Name', 'Email', 'Approved', 'Total Applications', 'Selected'])
-    
-    # Data
-    for student in students:
-        ws.append([
-            student['name'],
-            student['email'],
-            'Yes' if student['is_approved'] else 'No',
-            student['total_applications'] or 0,
-            student['selected_count'] or 0
-        ])
-    
-    # Save to BytesIO
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    return send_file(output, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                    as_attachment=True, download_name=f'{department}_report.xlsx')
+    # Documents render in a process pool and are zipped into the response as they finish
+    return Response(stream_with_context(chunks), mimetype='application/zip',
+                    headers={'Content-Disposition': f'attachment; filename="{department}_placement_pdfs.zip"'})
 
 # ==================== TPO Routes ====================
 
@@ -528,30 +567,7 @@ def export_hod_report():
 def tpo_dashboard():
     """TPO/Admin dashboard"""
     # Get statistics
-    total_students = db.execute_query(
-        "SELECT COUNT(*) as count FROM users WHERE role = 'student'",
-        fetch_one=True
-    )
-    
-    total_drives = db.execute_query(
-        "SELECT COUNT(*) as count FROM drives",
-        fetch_one=True
-    )
-    
-    active_drives = db.execute_query(
-        "SELECT COUNT(*) as count FROM drives WHERE status = 'active' AND last_date >= CURDATE()",
-        fetch_one=True
-    )
-    
-    total_applications = db.execute_query(
-        "SELECT COUNT(*) as count FROM applications",
-        fetch_one=True
-    )
-    
-    selected_count = db.execute_query(
-        "SELECT COUNT(*) as count FROM applications WHERE status = 'Selected'",
-        fetch_one=True
-    )
+    stats = cache.get_or_set(TPO_STATS_KEY, stats_service.get_tpo_stats)
     
     # Get recent drives
     drives = db.execute_query(
@@ -571,11 +587,11 @@ def tpo_dashboard():
     )
     
     return render_template('tpo_dashboard.html',
-                         total_students=total_students['count'] if total_students else 0,
-                         total_drives=total_drives['count'] if total_drives else 0,
-                         active_drives=active_drives['count'] if active_drives else 0,
-                         total_applications=total_applications['count'] if total_applications else 0,
-                         selected_count=selected_count['count'] if selected_count else 0,
+                         total_students=stats['total_students'],
+                         total_drives=stats['total_drives'],
+                         active_drives=stats['active_drives'],
+                         total_applications=stats['total_applications'],
+                         selected_count=stats['selected_count'],
                          drives=drives or [],
                          applications=applications or [])
 
@@ -594,10 +610,14 @@ def create_drive():
         flash('Company name, job role, and last date are required.', 'error')
         return redirect(url_for('tpo_dashboard'))
     
-    db.execute_query(
-        "INSERT INTO drives (company_name, job_role, job_description, eligibility, last_date, created_by) VALUES (%s, %s, %s, %s, %s, %s)",
-        (company_name, job_role, job_description, eligibility, last_date, session['user_id'])
-    )
+    with db.transaction():
+        db.execute_query(
+            "INSERT INTO drives (company_name, job_role, job_description, eligibility, last_date, created_by) VALUES (%s, %s, %s, %s, %s, %s)",
+            (company_name, job_role, job_description, eligibility, last_date, session['user_id'])
+        )
+        stats_service.record_drive_created()
+    
+    cache.delete(ACTIVE_DRIVES_KEY, TPO_STATS_KEY)
     
     flash('Placement drive created successfully!', 'success')
     return redirect(url_for('tpo_dashboard'))
@@ -628,30 +648,148 @@ def update_application_status(app_id):
         flash('Application not found.', 'error')
         return redirect(url_for('tpo_dashboard'))
     
-    # Update status
-    db.execute_query(
-        "UPDATE applications SET status = %s WHERE id = %s",
-        (status, app_id)
-    )
+    # Update status and create notification in one commit
+    with db.transaction():
+        db.execute_query(
+            "UPDATE applications SET status = %s WHERE id = %s",
+            (status, app_id)
+        )
+        
+        db.execute_query(
+            "INSERT INTO notifications (user_id, message, type) VALUES (%s, %s, %s)",
+            (application['student_id'], f"Your application status updated to {status} for {application['company_name']}", 'info')
+        )
+        
+        stats_service.record_status_changed(application['status'], status)
+        
+        # Queue email notification (sent in the background)
+        send_application_update_email(
+            student_email=application['email'],
+            student_name=application['student_name'],
+            company_name=application['company_name'],
+            job_role=application['job_role'],
+            status=status
+        )
     
-    # Send email notification
-    send_application_update_email(
-        student_email=application['email'],
-        student_name=application['student_name'],
-        company_name=application['company_name'],
-        job_role=application['job_role'],
-        status=status
-    )
+    cache.delete(TPO_STATS_KEY)
     
-    # Create notification
-    db.execute_query(
-        "INSERT INTO notifications (user_id, message, type) VALUES (%s, %s, %s)",
-        (application['student_id'], f"Your application status updated to {status} for {application['company_name']}", 'info')
-    )
+    flash('Application status updated and email queued.', 'success')
+    return redirect(url_for('tpo_dashboard'))
+
+@app.route('/tpo/bulk_update_status', methods=['POST'])
+@login_required
+@role_required('tpo')
+def bulk_update_status():
+    """
+    Update many application statuses in one transaction
+    
+    JSON: {"status": "Shortlisted", "application_ids": [1, 2, 3]}
+       or {"status": ..., "updates": [{"application_id": 1, "status": "Selected"}, ...]}
+       or {"drive_id": 5, "status": ..., "csv": "email,status\n..."}
+    Form: drive_id, status and a CSV file (email[,status] per line)
+    """
+    is_json = request.is_json
+    data = (request.get_json(silent=True) or {}) if is_json else request.form
+    default_status = bulk_status.normalize_status(data.get('status'))
+    
+    try:
+        if data.get('drive_id'):
+            if is_json:
+                csv_text = data.get('csv', '')
+            else:
+                file = request.files.get('file')
+                csv_text = file.read().decode('utf-8-sig', errors='replace') if file else ''
+            rows = bulk_status.parse_email_csv(csv_text, default_status)
+            targets, unknown_emails = bulk_status.resolve_drive_emails(int(data['drive_id']), rows)
+        else:
+            unknown_emails = []
+            targets = [
+                (int(u['application_id']), bulk_status.normalize_status(u.get('status')) or default_status)
+                for u in data.get('updates', [])
+            ]
+            ids = data.get('application_ids', [])
+            if isinstance(ids, str):
+                ids = [i for i in ids.split(',') if i.strip()]
+            targets += [(int(app_id), default_status) for app_id in ids]
+        
+        if not targets and not unknown_emails:
+            raise bulk_status.BulkUpdateError('No applications given')
+        result = bulk_status.apply_status_updates(targets)
+    except (ValueError, KeyError, TypeError) as e:  # BulkUpdateError or malformed input
+        if is_json:
+            return jsonify({'error': str(e)}), 400
+        flash(f'Bulk update failed: {e}', 'error')
+        return redirect(url_for('tpo_dashboard'))
+    
+    cache.delete(TPO_STATS_KEY)
+    result['unknown_emails'] = unknown_emails
     
-    flash('Application status updated and email sent.', 'success')
+    if is_json:
+        return jsonify(result)
+    message = f"Updated {result['updated']} of {result['processed']} application(s) in {result['elapsed_ms']} ms; {result['emails_queued']} email(s) queued."
+    if unknown_emails:
+        message += f" {len(unknown_emails)} email(s) have no application for this drive."
+    flash(message, 'success')
     return redirect(url_for('tpo_dashboard'))
 
+@app.route('/tpo/search')
+@login_required
+@role_required('tpo')
+def search_resumes():
+    """
+    Search students' latest resumes
+    
+    Query params: q (see search_index), department, approved (1/0), limit, offset
+    e.g. /tpo/search?q=skill:docker skill:react&department=Computer Science&approved=1
+    """
+    approved = request.args.get('approved')
+    approved = None if approved in (None, '') else approved.lower() in ('1', 'true', 'yes')
+    limit = parse_limit(request.args.get('limit'))
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    
+    start = time.perf_counter()
+    try:
+        result = search_index.search(
+            request.args.get('q', ''),
+            department=request.args.get('department') or None,
+            approved=approved,
+            limit=limit,
+            offset=offset
+        )
+    except search_index.QueryError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    return jsonify(result)
+
+@app.route('/tpo/drive/<int:drive_id>/rank')
+@login_required
+@role_required('tpo')
+def rank_drive_applicants(drive_id):
+    """
+    Rank every applicant of a drive against its job description (local scoring)
+    
+    Query params: limit (shortlist size), deep_review (send the top K to Gemini)
+    """
+    drive = db.execute_query(
+        "SELECT id, company_name, job_role, job_description FROM drives WHERE id = %s",
+        (drive_id,),
+        fetch_one=True
+    )
+    
+    if not drive:
+        return jsonify({'error': 'Drive not found'}), 404
+    
+    limit = max(1, min(request.args.get('limit', 50, type=int), 1000))
+    result = rank_applicants(drive, limit=limit)
+    
+    top_k = max(0, min(request.args.get('deep_review', 0, type=int), MAX_DEEP_REVIEW))
+    if top_k:
+        deep_review(drive, result['applicants'], top_k)
+    
+    result['drive'] = drive
+    return jsonify(result)
+
 @app.route('/tpo/upload_offer_letter/<int:app_id>', methods=['POST'])
 @login_required
 @role_required('tpo')
@@ -690,97 +828,174 @@ def upload_offer_letter(app_id):
     file_path = os.path.join(app.config['UPLOAD_FOLDER'], 'offers', filename)
     file.save(file_path)
     
-    # Update application status to Selected
-    db.execute_query(
-        "UPDATE applications SET status = 'Selected' WHERE id = %s",
-        (app_id,)
-    )
-    
-    # Save offer letter record
-    db.execute_query(
-        "INSERT INTO offer_letters (application_id, file_path, uploaded_by) VALUES (%s, %s, %s)",
-        (app_id, file_path, session['user_id'])
-    )
+    # Update status, save offer letter record and create notification in one commit
+    with db.transaction():
+        db.execute_query(
+            "UPDATE applications SET status = 'Selected' WHERE id = %s",
+            (app_id,)
+        )
+        
+        db.execute_query(
+            "INSERT INTO offer_letters (application_id, file_path, uploaded_by) VALUES (%s, %s, %s)",
+            (app_id, file_path, session['user_id'])
+        )
+        
+        db.execute_query(
+            "INSERT INTO notifications (user_id, message, type) VALUES (%s, %s, %s)",
+            (application['student_id'], f"Offer letter received from {application['company_name']}!", 'success')
+        )
+        
+        stats_service.record_status_changed(application['status'], 'Selected')
+        
+        # Queue email with offer letter (sent in the background)
+        send_application_update_email(
+            student_email=application['email'],
+            student_name=application['student_name'],
+            company_name=application['company_name'],
+            job_role=application['job_role'],
+            status='Selected',
+            offer_letter_path=file_path
+        )
     
-    # Send email with offer letter
-    send_application_update_email(
-        student_email=application['email'],
-        student_name=application['student_name'],
-        company_name=application['company_name'],
-        job_role=application['job_role'],
-        status='Selected',
-        offer_letter_path=file_path
-    )
+    cache.delete(TPO_STATS_KEY)
     
-    # Create notification
-    db.execute_query(
-        "INSERT INTO notifications (user_id, message, type) VALUES (%s, %s, %s)",
-        (application['student_id'], f"Offer letter received from {application['company_name']}!", 'success')
-    )
-    
-    flash('Offer letter uploaded and email sent successfully!', 'success')
+    flash('Offer letter uploaded and email queued successfully!', 'success')
     return redirect(url_for('tpo_dashboard'))
 
 @app.route('/tpo/export_report')
 @login_required
 @role_required('tpo')
 def export_tpo_report():
-    """Export comprehensive placement report as Excel"""
-    # Get all data
-    students = db.execute_query(
-        """SELECT u.*, 
-                  COUNT(DISTINCT a.id) as total_applications,
-                  COUNT(DISTINCT CASE WHEN a.status = 'Selected' THEN a.id END) as selected_count
-           FROM users u
-           LEFT JOIN applications a ON u.id = a.student_id
-           WHERE u.role = 'student'
-           GROUP BY u.id""",
-        fetch_all=True
+    """Export comprehensive placement report as Excel, CSV, Parquet or Arrow (?format=, optional ?sheet=)"""
+    # Students, Drives and Applications sheets, served from the report cache until the data changes
+    try:
+        return report_cache.export_response('tpo', None, request.args.get('format'), request.args.get('sheet'))
+    except reports.ReportError as e:
+        flash(str(e), 'error')
+        return redirect(url_for('tpo_dashboard'))
+
+@app.route('/tpo/export_pdf')
+@login_required
+@role_required('tpo')
+def export_tpo_pdf():
+    """Department summaries and placement certificates (all or ?department=) as a zip of PDFs"""
+    include = request.args.get('include', 'all')
+    chunks = pdf_reports.generate_zip(
+        department=request.args.get('department') or None,
+        certificates=include in ('all', 'certificates'),
+        summaries=include in ('all', 'summaries')
     )
+    try:
+        next(chunks)
+    except pdf_reports.PdfBusy as e:
+        flash(str(e), 'error')
+        return redirect(url_for('tpo_dashboard'))
     
-    drives = db.execute_query(
-        "SELECT * FROM drives ORDER BY created_at DESC",
+    # Documents render in a process pool and are zipped into the response as they finish
+    return Response(stream_with_context(chunks), mimetype='application/zip',
+                    headers={'Content-Disposition': 'attachment; filename="placement_pdfs.zip"'})
+
+# ==================== API Routes ====================
+
+@app.route('/api/applications')
+@login_required
+@role_required('tpo', 'hod')
+def api_applications():
+    """
+    Keyset-paginated applications, newest first
+    
+    Query params: status, drive_id, department (HODs always see their own), limit, cursor
+    """
+    conditions = []
+    params = []
+    
+    status = request.args.get('status')
+    if status:
+        conditions.append("a.status = %s")
+        params.append(status)
+    
+    drive_id = request.args.get('drive_id', type=int)
+    if drive_id:
+        conditions.append("a.drive_id = %s")
+        params.append(drive_id)
+    
+    if session.get('role') == 'hod':
+        department = session.get('department')
+        if not department:
+            # Never fall back to every department's applications
+            return jsonify({'error': 'No department assigned to this HOD account'}), 403
+    else:
+        department = request.args.get('department')
+    if department:
+        conditions.append("u.department = %s")
+        params.append(department)
+    
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            applied_at, last_id = decode_cursor(cursor)
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+        conditions.append(keyset_condition('a.applied_at', 'a.id'))
+        params.extend(keyset_params(applied_at, last_id))
+    
+    limit = parse_limit(request.args.get('limit'))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    
+    rows = db.execute_query(
+        f"""SELECT a.id, a.student_id, a.drive_id, a.status, a.applied_at, a.updated_at,
+                   u.name as student_name, u.email, u.department, d.company_name, d.job_role
+            FROM applications a
+            JOIN users u ON a.student_id = u.id
+            JOIN drives d ON a.drive_id = d.id
+            {where}
+            ORDER BY a.applied_at DESC, a.id DESC
+            LIMIT %s""",
+        (*params, limit + 1),
         fetch_all=True
     )
     
-    # Create Excel file with multiple sheets
-    wb = openpyxl.Workbook()
-    
-    # Students sheet
-    ws1 = wb.active
-    ws1.title = "Students"
-    ws1.append(['Name', 'Email', 'Department', 'Approved', 'Total Applications', 'Selected'])
-    for student in students:
-        ws1.append([
-            student['name'],
-            student['email'],
-            student.get('department', ''),
-            'Yes' if student['is_approved'] else 'No',
-            student['total_applications'] or 0,
-            student['selected_count'] or 0
-        ])
-    
-    # Drives sheet
-    ws2 = wb.create_sheet("Drives")
-    ws2.append(['Company', 'Job Role', 'Eligibility', 'Last Date', 'Status'])
-    for drive in drives:
-        ws2.append([
-            drive['company_name'],
-            drive['job_role'],
-            drive.get('eligibility', ''),
-            str(drive['last_date']),
-            drive['status']
-        ])
-    
-    # Save to BytesIO
-    output = BytesIO()
-    wb.save(output)
-    output.seek(0)
-    
-    return send_file(output, mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                    as_attachment=True, download_name='placement_report.xlsx')
+    return jsonify(build_page(rows or [], limit, 'applied_at'))
 
-# ==================== API Routes ====================
+@app.route('/api/drives')
+@login_required
+def api_drives():
+    """
+    Keyset-paginated drives, newest first
+    
+    Query params: status, limit, cursor
+    """
+    conditions = []
+    params = []
+    
+    status = request.args.get('status')
+    if status:
+        conditions.append("status = %s")
+        params.append(status)
+    
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            created_at, last_id = decode_cursor(cursor)
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+        conditions.append(keyset_condition('created_at', 'id'))
+        params.extend(keyset_params(created_at, last_id))
+    
+    limit = parse_limit(request.args.get('limit'))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    
+    rows = db.execute_query(
+        f"""SELECT id, company_name, job_role, job_description, eligibility, last_date, status, created_at
+            FROM drives
+            {where}
+            ORDER BY created_at DESC, id DESC
+            LIMIT %s""",
+        (*params, limit + 1),
+        fetch_all=True
+    )
+    
+    return jsonify(build_page(rows or [], limit, 'created_at'))
 
 @app.route('/api/notifications/mark_read/<int:notif_id>', methods=['POST'])
 @login_required
@@ -792,6 +1007,41 @@ def mark_notification_read(notif_id):
     )
     return jsonify({'success': True})
 
+@app.route('/api/db/pool_stats')
+@login_required
+@role_required('tpo')
+def db_pool_stats():
+    """Database connection pool statistics"""
+    return jsonify(db.pool_stats())
+
+@app.route('/api/cache/stats')
+@login_required
+@role_required('tpo')
+def cache_stats():
+    """Dashboard cache statistics"""
+    return jsonify(cache.stats())
+
+@app.route('/api/mail/outbox_stats')
+@login_required
+@role_required('tpo')
+def mail_outbox_stats():
+    """Email outbox queue depth"""
+    return jsonify(mail_outbox.queue_stats())
+
+@app.route('/api/reports/cache_stats')
+@login_required
+@role_required('tpo')
+def report_cache_stats():
+    """Cached report exports and the current data version"""
+    return jsonify(report_cache.cache_stats())
+
+@app.route('/api/gemini/stats')
+@login_required
+@role_required('tpo')
+def gemini_stats():
+    """Gemini call metrics and circuit breaker state"""
+    return jsonify(gemini_client.stats())
+
 # ==================== Error Handlers ====================
 
 @app.errorhandler(404)
@@ -812,5 +1062,8 @@ if __name__ == '__main__':
     except Exception as e:
         print(f"Database initialization note: {e}")
     
+    # With the debug reloader, only the serving child runs background threads
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        init_background(app)
     app.run(debug=True, host='0.0.0.0', port=5000)
 
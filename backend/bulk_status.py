@@ -0,0 +1,175 @@
+"""
+Bulk application status updates
+
+Applies many status changes in one transaction: one lookup query and one
+UPDATE ... WHERE id IN (...) per chunk and target status, a multi-row insert
+for the notifications and another for the outbox emails.
+"""
+import csv
+import io
+import os
+import time
+
+from database import db
+import stats_service
+from mail_utils import send_application_update_emails
+
+APPLICATION_STATUSES = ('Applied', 'Shortlisted', 'Selected', 'Rejected')
+
+BULK_UPDATE_MAX = int(os.getenv('BULK_UPDATE_MAX', 5000))
+
+# Ids per IN (...) list
+CHUNK_SIZE = 500
+
+
+class BulkUpdateError(ValueError):
+    """The request cannot be applied (bad status, too many rows, malformed CSV)"""
+
+
+def _chunks(items, size=CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def normalize_status(value):
+    """Canonical status for case-insensitive input, or None"""
+    for status in APPLICATION_STATUSES:
+        if status.lower() == (value or '').strip().lower():
+            return status
+    return None
+
+
+def parse_email_csv(text, default_status=None):
+    """
+    Rows of a CSV with an email column and an optional status column
+
+    A header row (first cell 'email') is skipped. Rows without a status use
+    default_status.
+
+    Returns:
+        list of (email, status)
+    """
+    rows = []
+    for line_number, row in enumerate(csv.reader(io.StringIO(text)), 1):
+        cells = [cell.strip() for cell in row]
+        if not cells or not cells[0]:
+            continue
+        if line_number == 1 and cells[0].lower() == 'email':
+            continue
+        raw_status = cells[1] if len(cells) > 1 and cells[1] else default_status
+        status = normalize_status(raw_status)
+        if not status:
+            raise BulkUpdateError(f"Line {line_number}: invalid or missing status '{raw_status or ''}'")
+        rows.append((cells[0].lower(), status))
+    return rows
+
+
+def resolve_drive_emails(drive_id, email_statuses):
+    """
+    Map (email, status) rows of one drive to application ids
+
+    Returns:
+        (list of (application_id, status), list of emails with no application in the drive)
+    """
+    wanted = dict(email_statuses)  # last status wins for repeated emails
+    emails = list(wanted)
+    found = {}
+    for chunk in _chunks(emails):
+        placeholders = ', '.join(['%s'] * len(chunk))
+        rows = db.execute_query(
+            f"""SELECT a.id, LOWER(u.email) AS email
+                FROM applications a
+                JOIN users u ON a.student_id = u.id
+                WHERE a.drive_id = %s AND u.email IN ({placeholders})""",
+            (drive_id, *chunk),
+            fetch_all=True
+        ) or []
+        for row in rows:
+            found[row['email']] = row['id']
+    targets = [(found[email], wanted[email]) for email in emails if email in found]
+    missing = [email for email in emails if email not in found]
+    return targets, missing
+
+
+def apply_status_updates(targets):
+    """
+    Apply (application_id, status) pairs in one transaction
+
+    Applications already in the target status are left alone (no
+    notification or email).
+
+    Returns:
+        dict with processed, updated, unchanged, not_found (ids), notifications,
+        emails_queued and elapsed_ms
+
+    Raises:
+        BulkUpdateError: If a status is invalid or there are too many rows
+    """
+    start = time.perf_counter()
+    wanted = dict(targets)  # last status wins for repeated ids
+    if len(wanted) > BULK_UPDATE_MAX:
+        raise BulkUpdateError(f'At most {BULK_UPDATE_MAX} applications per bulk update')
+    for status in set(wanted.values()):
+        if status not in APPLICATION_STATUSES:
+            raise BulkUpdateError(f"Missing or invalid status '{status or ''}'")
+
+    updated = emails_queued = 0
+    with db.transaction():
+        # Read on the primary inside the transaction so old statuses are current
+        applications = {}
+        for chunk in _chunks(list(wanted)):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            rows = db.execute_query(
+                f"""SELECT a.id, a.status, a.student_id, u.email, u.name as student_name, d.company_name, d.job_role
+                    FROM applications a
+                    JOIN users u ON a.student_id = u.id
+                    JOIN drives d ON a.drive_id = d.id
+                    WHERE a.id IN ({placeholders})""",
+                tuple(chunk),
+                fetch_all=True
+            ) or []
+            for row in rows:
+                applications[row['id']] = row
+
+        # new status -> applications moving to it
+        changes = {}
+        for app_id, status in wanted.items():
+            application = applications.get(app_id)
+            if application and application['status'] != status:
+                changes.setdefault(status, []).append(application)
+
+        for status, moving in changes.items():
+            for chunk in _chunks(moving):
+                placeholders = ', '.join(['%s'] * len(chunk))
+                updated += db.execute_query(
+                    f"UPDATE applications SET status = %s WHERE id IN ({placeholders})",
+                    (status, *(a['id'] for a in chunk))
+                ) or 0
+
+            transitions = {}
+            for application in moving:
+                transitions[application['status']] = transitions.get(application['status'], 0) + 1
+            for old_status, count in transitions.items():
+                stats_service.record_status_changed(old_status, status, count)
+
+            emails_queued += send_application_update_emails(moving, status)
+
+        notifications = [
+            (a['student_id'], f"Your application status updated to {status} for {a['company_name']}", 'info')
+            for status, moving in changes.items()
+            for a in moving
+        ]
+        db.executemany(
+            "INSERT INTO notifications (user_id, message, type) VALUES (%s, %s, %s)",
+            notifications
+        )
+
+    return {
+        'processed': len(wanted),
+        'updated': updated,
+        'unchanged': sum(1 for app_id in wanted if app_id in applications) - sum(len(m) for m in changes.values()),
+        'not_found': [app_id for app_id in wanted if app_id not in applications],
+        'notifications': len(notifications),
+        'emails_queued': emails_queued,
+        'elapsed_ms': round((time.perf_counter() - start) * 1000, 1),
+    }
@@ -0,0 +1,224 @@
+"""
+Response cache for data shared by many users (active drives, dashboard counters)
+
+Backends:
+    memory - in-process TTL + LRU cache with an entry and memory bound (single worker)
+    redis  - Redis-compatible store shared by all gunicorn workers; configure
+             the server with maxmemory + allkeys-lru for the memory bound
+    none   - caching disabled
+
+Entries expire after their TTL and are also invalidated explicitly by the
+routes that write the underlying data.
+"""
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory').lower()
+CACHE_URL = os.getenv('CACHE_URL', 'redis://localhost:6379/0')
+CACHE_TTL = int(os.getenv('CACHE_TTL', 60))
+CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 1024))
+CACHE_MAX_BYTES = int(os.getenv('CACHE_MAX_BYTES', 32 * 1024 * 1024))
+
+# Cache keys
+ACTIVE_DRIVES_KEY = 'drives:active'
+TPO_STATS_KEY = 'stats:tpo'
+HOD_STATS_PREFIX = 'stats:hod:'
+
+_MISSING = object()
+
+
+def hod_stats_key(department):
+    return f"{HOD_STATS_PREFIX}{department or ''}"
+
+
+class BaseCache:
+    """Common get_or_set logic"""
+
+    def get_or_set(self, key, loader, ttl=None):
+        """Return the cached value for key, calling loader() on a miss"""
+        value = self.get(key)
+        if value is not _MISSING:
+            return value
+        value = loader()
+        self.set(key, value, ttl)
+        return value
+
+
+class NullCache(BaseCache):
+    """Caching disabled"""
+
+    def get(self, key):
+        return _MISSING
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+    def delete_prefix(self, prefix):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self):
+        return {'backend': 'none'}
+
+
+class MemoryCache(BaseCache):
+    """Thread-safe in-process cache with TTL, LRU eviction and a memory bound"""
+
+    def __init__(self, default_ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> (value, expires_at, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return _MISSING
+            value, expires_at, _ = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return _MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        # Size is estimated from the pickled value
+        size = len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.default_ttl)
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, expires_at, size)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key):
+        _, _, size = self._data.pop(key)
+        self._bytes -= size
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                if key in self._data:
+                    self._remove(key)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+class RedisCache(BaseCache):
+    """Cache shared across gunicorn workers through a Redis-compatible server"""
+
+    def __init__(self, url=CACHE_URL, default_ttl=CACHE_TTL, namespace='placement:'):
+        import redis
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.default_ttl = default_ttl
+        self.namespace = namespace
+
+    def get(self, key):
+        try:
+            raw = self.client.get(self.namespace + key)
+        except Exception as e:
+            # A cache outage must never take the dashboards down
+            print(f"Cache get error: {e}")
+            return _MISSING
+        return _MISSING if raw is None else pickle.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        try:
+            self.client.set(self.namespace + key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                            ex=ttl if ttl is not None else self.default_ttl)
+        except Exception as e:
+            print(f"Cache set error: {e}")
+
+    def delete(self, *keys):
+        if not keys:
+            return
+        try:
+            self.client.delete(*[self.namespace + key for key in keys])
+        except Exception as e:
+            print(f"Cache delete error: {e}")
+
+    def delete_prefix(self, prefix):
+        try:
+            keys = list(self.client.scan_iter(match=f"{self.namespace}{prefix}*"))
+            if keys:
+                self.client.delete(*keys)
+        except Exception as e:
+            print(f"Cache delete error: {e}")
+
+    def clear(self):
+        self.delete_prefix('')
+
+    def stats(self):
+        try:
+            info = self.client.info('stats')
+            memory = self.client.info('memory')
+            return {
+                'backend': 'redis',
+                'hits': info.get('keyspace_hits'),
+                'misses': info.get('keyspace_misses'),
+                'evictions': info.get('evicted_keys'),
+                'bytes': memory.get('used_memory'),
+                'max_bytes': memory.get('maxmemory'),
+            }
+        except Exception as e:
+            return {'backend': 'redis', 'error': str(e)}
+
+
+def create_cache(backend=CACHE_BACKEND):
+    """Build the configured cache backend"""
+    if backend == 'redis':
+        try:
+            return RedisCache()
+        except ImportError:
+            print("⚠️ CACHE_BACKEND=redis but the redis package is not installed; using in-process cache")
+    if backend == 'none':
+        return NullCache()
+    return MemoryCache()
+
+
+# Global instance
+cache = create_cache()
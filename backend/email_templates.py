@@ -0,0 +1,94 @@
+"""
+Cached email templates
+
+Status emails only differ by type, company and role, so Gemini writes one
+template per (email_type, company_name, job_role) with a placeholder for the
+student's name. Templates are stored in email_templates and kept in an
+in-process LRU, and each email is rendered locally: notifying 300
+shortlisted students costs one generation instead of 300.
+
+Bump TEMPLATE_VERSION when the generation prompt changes so new templates
+are generated instead of reusing stored ones.
+"""
+import hashlib
+import os
+import re
+
+from cache import MemoryCache
+from database import db
+from gemini_ai import RECIPIENT_PLACEHOLDER, generate_email_template
+
+TEMPLATE_VERSION = 1
+
+EMAIL_TEMPLATE_CACHE_TTL = int(os.getenv('EMAIL_TEMPLATE_CACHE_TTL', 24 * 3600))
+EMAIL_TEMPLATE_CACHE_SIZE = int(os.getenv('EMAIL_TEMPLATE_CACHE_SIZE', 256))
+
+# Name slots Gemini sometimes writes instead of the placeholder
+NAME_SLOT = re.compile(r'\[(?:recipient|student|candidate)?\s*(?:full\s*)?name\]', re.IGNORECASE)
+
+_templates = MemoryCache(default_ttl=EMAIL_TEMPLATE_CACHE_TTL, max_entries=EMAIL_TEMPLATE_CACHE_SIZE)
+
+
+def template_key(email_type, company_name, job_role):
+    raw = f"{email_type}\n{company_name}\n{job_role}\nv{TEMPLATE_VERSION}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def _load_or_generate(key, email_type, company_name, job_role):
+    row = db.execute_query(
+        "SELECT subject, body, version FROM email_templates WHERE template_key = %s",
+        (key,),
+        fetch_one=True
+    )
+    if row:
+        return {'subject': row['subject'], 'body': row['body'], 'version': row['version'], 'source': 'gemini'}
+
+    template = generate_email_template(email_type, company_name, job_role)
+    template['subject'] = NAME_SLOT.sub(RECIPIENT_PLACEHOLDER, template['subject'])[:255]
+    template['body'] = NAME_SLOT.sub(RECIPIENT_PLACEHOLDER, template['body'])
+    template['version'] = TEMPLATE_VERSION
+    if template['source'] == 'gemini':
+        # Another worker may have stored the same template meanwhile; either one is fine
+        db.execute_query(
+            """INSERT IGNORE INTO email_templates
+                   (template_key, email_type, company_name, job_role, version, subject, body)
+               VALUES (%s, %s, %s, %s, %s, %s, %s)""",
+            (key, email_type, company_name, job_role, TEMPLATE_VERSION, template['subject'], template['body'])
+        )
+    return template
+
+
+def get_template(email_type, company_name, job_role):
+    """
+    Template for (email_type, company, role): LRU, then database, then Gemini
+
+    Default templates (Gemini not configured or failing) are neither stored
+    nor cached, so Gemini is tried again for the next email.
+    """
+    key = template_key(email_type, company_name, job_role)
+    template = _templates.get(key)
+    if isinstance(template, dict):
+        return template
+    template = _load_or_generate(key, email_type, company_name, job_role)
+    if template['source'] == 'gemini':
+        _templates.set(key, template)
+    return template
+
+
+def render_email(email_type, recipient_name, company_name, job_role):
+    """
+    Email for one student rendered from the cached template
+
+    Returns:
+        dict with subject, body and template_version
+    """
+    template = get_template(email_type, company_name, job_role)
+    return {
+        'subject': template['subject'].replace(RECIPIENT_PLACEHOLDER, recipient_name),
+        'body': template['body'].replace(RECIPIENT_PLACEHOLDER, recipient_name),
+        'template_version': template['version']
+    }
+
+
+def cache_stats():
+    return _templates.stats()
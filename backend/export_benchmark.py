@@ -0,0 +1,95 @@
+"""
+Export memory benchmark
+
+Compares peak memory and time of the old in-memory export (regular
+openpyxl Workbook saved to BytesIO) with the streaming write-only export
+(reports.write_xlsx) on synthetic student rows. No database is needed: rows
+come from a generator shaped like the Students sheet. Each measurement runs
+in a fresh process so peak RSS is not shared between runs.
+
+Usage:
+    python export_benchmark.py [--sizes 1000,10000,50000,200000] [--skip-baseline]
+"""
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+# Add backend directory to path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+DEFAULT_SIZES = [1000, 10000, 50000, 200000]
+DEPARTMENTS = ['Computer Science', 'Electronics', 'Mechanical', 'Civil', 'Electrical']
+HEADERS = ['Name', 'Email', 'Department', 'Approved', 'Total Applications', 'Selected']
+
+
+def synthetic_students(count):
+    for i in range(count):
+        yield [
+            f'Student {i}',
+            f'student{i}@college.edu',
+            DEPARTMENTS[i % len(DEPARTMENTS)],
+            'Yes' if i % 3 else 'No',
+            i % 12,
+            1 if i % 7 == 0 else 0
+        ]
+
+
+def _peak_rss_mb():
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def _run(method, count):
+    """Runs in a fresh process; returns (seconds, peak RSS growth in MB, file size in bytes)"""
+    import openpyxl
+    from reports import Sheet, write_xlsx
+
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    if method == 'in-memory':
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = 'Students'
+        ws.append(HEADERS)
+        for row in synthetic_students(count):
+            ws.append(row)
+        output = BytesIO()
+        wb.save(output)
+        size = output.tell()
+    else:
+        output = write_xlsx([Sheet('Students', HEADERS, synthetic_students(count))])
+        output.seek(0, os.SEEK_END)
+        size = output.tell()
+        output.close()
+    seconds = time.perf_counter() - start
+    return seconds, _peak_rss_mb() - baseline, size
+
+
+def measure(method, count):
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(_run, method, count).result()
+
+
+def main(args):
+    sizes = DEFAULT_SIZES
+    if '--sizes' in args:
+        sizes = [int(s) for s in args[args.index('--sizes') + 1].split(',')]
+    methods = ['streaming'] if '--skip-baseline' in args else ['in-memory', 'streaming']
+
+    print(f"{'method':<12}{'students':>10}{'seconds':>10}{'peak MB':>10}{'file MB':>10}{'rows/s':>10}")
+    for count in sizes:
+        for method in methods:
+            seconds, peak_mb, size = measure(method, count)
+            print(f"{method:<12}{count:>10}{seconds:>10.2f}{peak_mb:>10.1f}"
+                  f"{size / 1024 / 1024:>10.1f}{count / seconds if seconds else 0:>10.0f}")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -2,8 +2,12 @@
 Google Gemini API integration for AI features
 """
 import google.generativeai as genai
+import json
 import os
+import re
 from dotenv import load_dotenv
+from skills import extract_skills, local_analysis
+from gemini_client import client
 
 load_dotenv()
 
@@ -12,7 +16,23 @@ GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
 
-def analyze_resume(resume_text, job_role, job_description=""):
+# Bump whenever the analysis prompt changes so cached analyses are not reused
+PROMPT_VERSION = 1
+
+# Stands in for the student's name in cached email templates
+RECIPIENT_PLACEHOLDER = '{{recipient_name}}'
+
+# Resume text sent per candidate (same cap as the single-resume prompt)
+RESUME_CHAR_LIMIT = 5000
+
+# Batch analysis limits; tokens are estimated as characters / 4
+BATCH_MAX_RESUMES = int(os.getenv('GEMINI_BATCH_MAX_RESUMES', 10))
+BATCH_MAX_INPUT_TOKENS = int(os.getenv('GEMINI_BATCH_MAX_INPUT_TOKENS', 24000))
+BATCH_MAX_OUTPUT_TOKENS = int(os.getenv('GEMINI_BATCH_MAX_OUTPUT_TOKENS', 8000))
+BATCH_OUTPUT_TOKENS_PER_RESUME = 350
+BATCH_TIMEOUT = float(os.getenv('GEMINI_BATCH_TIMEOUT', 90))
+
+def analyze_resume(resume_text, job_role, job_description="", raise_errors=False):
     """
     Analyze resume using Gemini API and return job-fit analysis
     
@@ -20,18 +40,15 @@ def analyze_resume(resume_text, job_role, job_description=""):
         resume_text: Text content extracted from resume
         job_role: Job role/position name
         job_description: Optional job description
+        raise_errors: Re-raise API errors instead of falling back to the local
+                      analysis (background jobs use this to retry)
     
     Returns:
         dict with keys: skills, education, experience, job_fit_score, suggestions
+        (plus source='local' when the offline skill parser produced it)
     """
     if not GEMINI_API_KEY:
-        return {
-            'skills': [],
-            'education': 'Not analyzed',
-            'experience': 'Not analyzed',
-            'job_fit_score': 0,
-            'suggestions': 'Gemini API key not configured'
-        }
+        return local_analysis(resume_text, job_role, job_description)
     
     try:
         prompt = f"""
@@ -40,7 +57,7 @@ def analyze_resume(resume_text, job_role, job_description=""):
         Job Description: {job_description if job_description else 'Not provided'}
         
         Resume Content:
-        {resume_text[:5000]}  # Limit to 5000 chars
+        {resume_text[:RESUME_CHAR_LIMIT]}  # Limit to 5000 chars
         
         Please provide a JSON response with the following structure:
         {{
@@ -60,16 +77,13 @@ def analyze_resume(resume_text, job_role, job_description=""):
         Provide specific, actionable suggestions for improvement.
         """
         
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(prompt)
+        # Rate-limited, time-boxed call; raises GeminiUnavailable when the circuit is open
+        response_text = client.generate(prompt)
         
         # Parse response (Gemini may return markdown or plain text)
-        response_text = response.text.strip()
+        response_text = response_text.strip()
         
         # Try to extract JSON from response
-        import json
-        import re
-        
         # Look for JSON in the response
         json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
         if json_match:
@@ -90,24 +104,137 @@ def analyze_resume(resume_text, job_role, job_description=""):
         
     except Exception as e:
         print(f"Gemini API error: {e}")
-        return {
-            'skills': [],
-            'education': 'Analysis failed',
-            'experience': 'Analysis failed',
-            'job_fit_score': 0,
-            'suggestions': f'Error: {str(e)}'
-        }
+        if raise_errors:
+            raise
+        return local_analysis(resume_text, job_role, job_description)
+
+def estimate_tokens(text):
+    """Rough token count (about 4 characters per token for English)"""
+    return len(text) // 4 + 1
+
+def split_batches(candidates, fixed_tokens):
+    """
+    Group (key, resume_text) pairs so each batch stays under the token limits
+
+    Args:
+        candidates: list of (key, resume_text); texts already truncated
+        fixed_tokens: Tokens of the shared part of the prompt
+    """
+    max_resumes = max(1, min(BATCH_MAX_RESUMES, BATCH_MAX_OUTPUT_TOKENS // BATCH_OUTPUT_TOKENS_PER_RESUME))
+    batches, current, tokens = [], [], fixed_tokens
+    for key, text in candidates:
+        cost = estimate_tokens(text) + 20  # candidate header
+        if current and (len(current) >= max_resumes or tokens + cost > BATCH_MAX_INPUT_TOKENS):
+            batches.append(current)
+            current, tokens = [], fixed_tokens
+        current.append((key, text))
+        tokens += cost
+    if current:
+        batches.append(current)
+    return batches
+
+def build_batch_prompt(labelled, job_role, job_description):
+    """One prompt for several resumes; the job description is sent once"""
+    candidates = '\n\n'.join(
+        f'<candidate id="{label}">\n{text}\n</candidate>' for label, text in labelled
+    )
+    return f"""
+        Analyze each candidate's resume below for the role: {job_role}
+        
+        Job Description: {job_description if job_description else 'Not provided'}
+        
+        {candidates}
+        
+        Respond with JSON only, one entry per candidate id, in this structure:
+        {{
+            "candidates": [
+                {{
+                    "id": "C1",
+                    "skills": ["skill1", "skill2", ...],
+                    "education": "Summary of education",
+                    "experience": "Summary of experience",
+                    "job_fit_score": 85,
+                    "suggestions": "Improvement suggestions"
+                }}
+            ]
+        }}
+        
+        Score each candidate independently. Calculate job_fit_score (0-100) based on:
+        - Relevant skills match
+        - Education alignment
+        - Experience relevance
+        - Overall fit for the role
+        
+        Provide specific, actionable suggestions for each candidate.
+        """
+
+def parse_batch_response(response_text):
+    """Candidate id -> analysis dict from a batch response"""
+    json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+    if not json_match:
+        return {}
+    try:
+        data = json.loads(json_match.group())
+    except ValueError:
+        return {}
+    results = {}
+    for entry in data.get('candidates', []) if isinstance(data, dict) else []:
+        if isinstance(entry, dict) and entry.get('id'):
+            label = str(entry.pop('id'))
+            results[label] = {
+                'skills': entry.get('skills', []),
+                'education': entry.get('education', 'Not specified'),
+                'experience': entry.get('experience', 'Not specified'),
+                'job_fit_score': entry.get('job_fit_score', 0),
+                'suggestions': entry.get('suggestions', '')
+            }
+    return results
+
+def analyze_resumes_batch(resumes, job_role, job_description="", raise_errors=False):
+    """
+    Analyze many resumes for the same role with one Gemini call per batch
+    
+    Args:
+        resumes: list of (key, resume_text); key is any hashable id
+        job_role: Job role/position name
+        job_description: Optional job description
+        raise_errors: Re-raise API errors instead of falling back to the local analysis
+    
+    Returns:
+        dict key -> analysis (same keys as analyze_resume). Candidates missing
+        from a batch response are analyzed one at a time.
+    """
+    resumes = [(key, (text or '')[:RESUME_CHAR_LIMIT]) for key, text in resumes]
+    if not GEMINI_API_KEY:
+        return {key: local_analysis(text, job_role, job_description) for key, text in resumes}
+    
+    fixed_tokens = estimate_tokens(build_batch_prompt([], job_role, job_description))
+    results = {}
+    for batch in split_batches(resumes, fixed_tokens):
+        labels = {f'C{i}': key for i, (key, _) in enumerate(batch, 1)}
+        prompt = build_batch_prompt(
+            [(label, text) for label, (_, text) in zip(labels, batch)], job_role, job_description
+        )
+        try:
+            parsed = parse_batch_response(client.generate(prompt, timeout=BATCH_TIMEOUT))
+        except Exception as e:
+            print(f"Gemini batch error: {e}")
+            if raise_errors:
+                raise
+            parsed = {}
+            for label, (_, text) in zip(labels, batch):
+                parsed[label] = local_analysis(text, job_role, job_description)
+        
+        for label, (key, text) in zip(labels, batch):
+            if label in parsed:
+                results[key] = parsed[label]
+            else:
+                results[key] = analyze_resume(text, job_role, job_description, raise_errors=raise_errors)
+    return results
 
 def extract_skills_from_text(text):
     """Extract skills list from text"""
-    skills = []
-    # Common tech skills to look for
-    tech_skills = ['Python', 'Java', 'JavaScript', 'SQL', 'HTML', 'CSS', 'React', 'Node.js', 
-                   'Flask', 'Django', 'AWS', 'Azure', 'Git', 'Docker', 'Machine Learning']
-    for skill in tech_skills:
-        if skill.lower() in text.lower():
-            skills.append(skill)
-    return skills[:10]  # Limit to 10 skills
+    return extract_skills(text, limit=10)  # Limit to 10 skills
 
 def extract_field(text, field_name):
     """Extract a specific field from text"""
@@ -127,7 +254,7 @@ def extract_score(text):
             return score_int
     return 50  # Default score
 
-def generate_email_content(email_type, recipient_name, company_name, job_role, additional_info=""):
+def generate_email_content(email_type, recipient_name, company_name, job_role, additional_info="", raise_errors=False):
     """
     Generate professional email content using Gemini
     
@@ -137,6 +264,7 @@ def generate_email_content(email_type, recipient_name, company_name, job_role, a
         company_name: Company name
         job_role: Job role
         additional_info: Any additional context
+        raise_errors: Re-raise API errors instead of returning the default email
     
     Returns:
         Email subject and body
@@ -167,10 +295,7 @@ def generate_email_content(email_type, recipient_name, company_name, job_role, a
         [email body]
         """
         
-        model = genai.GenerativeModel("gemini-1.5-flash")
-        response = model.generate_content(prompt)
-        
-        response_text = response.text.strip()
+        response_text = client.generate(prompt).strip()
         
         # Parse subject and body
         lines = response_text.split('\n')
@@ -198,8 +323,38 @@ def generate_email_content(email_type, recipient_name, company_name, job_role, a
         
     except Exception as e:
         print(f"Email generation error: {e}")
+        if raise_errors:
+            raise
         return get_default_email(email_type, recipient_name, company_name, job_role)
 
+def generate_email_template(email_type, company_name, job_role):
+    """
+    Generate one email for every recipient of (email_type, company, role)
+    
+    The recipient's name is left as RECIPIENT_PLACEHOLDER and filled in per
+    student by email_templates.render_email().
+    
+    Returns:
+        dict with subject, body and source ('gemini', or 'default' when Gemini
+        is not configured or failed)
+    """
+    if GEMINI_API_KEY:
+        try:
+            content = generate_email_content(
+                email_type=email_type,
+                recipient_name=RECIPIENT_PLACEHOLDER,
+                company_name=company_name,
+                job_role=job_role,
+                additional_info=f"Write {RECIPIENT_PLACEHOLDER} exactly as shown wherever the recipient's name "
+                                f"appears; it is filled in later for each student.",
+                raise_errors=True
+            )
+            return {'subject': content['subject'], 'body': content['body'], 'source': 'gemini'}
+        except Exception:
+            pass
+    content = get_default_email(email_type, RECIPIENT_PLACEHOLDER, company_name, job_role)
+    return {'subject': content['subject'], 'body': content['body'], 'source': 'default'}
+
 def get_default_email(email_type, recipient_name, company_name, job_role):
     """Fallback default emails if Gemini fails"""
     templates = {
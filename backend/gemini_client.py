@@ -0,0 +1,233 @@
+"""
+Shared Gemini client
+
+Every Gemini call goes through GeminiClient.generate(), which applies, in order:
+    - a circuit breaker: after too many recent failures calls fail fast for
+      GEMINI_BREAKER_COOLDOWN seconds, then a single trial call decides
+      whether to close it again
+    - a token-bucket rate limit (GEMINI_RATE_PER_MINUTE, bursts of GEMINI_BURST)
+    - a cap on in-flight calls per process (GEMINI_MAX_IN_FLIGHT)
+    - a per-call deadline (GEMINI_TIMEOUT)
+
+A call that cannot be made raises GeminiUnavailable right away instead of
+queueing behind a slow API, so callers fall back to get_default_email() or
+the local analysis. The GenerativeModel is built once and reused.
+"""
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import google.generativeai as genai
+
+GEMINI_MODEL = os.getenv('GEMINI_MODEL', 'gemini-1.5-flash')
+GEMINI_RATE_PER_MINUTE = float(os.getenv('GEMINI_RATE_PER_MINUTE', 60))
+GEMINI_BURST = int(os.getenv('GEMINI_BURST', 5))
+GEMINI_MAX_IN_FLIGHT = int(os.getenv('GEMINI_MAX_IN_FLIGHT', 4))
+GEMINI_TIMEOUT = float(os.getenv('GEMINI_TIMEOUT', 30))  # seconds per call
+GEMINI_QUEUE_TIMEOUT = float(os.getenv('GEMINI_QUEUE_TIMEOUT', 2))  # max wait for a token or a slot
+GEMINI_BREAKER_WINDOW = int(os.getenv('GEMINI_BREAKER_WINDOW', 60))  # seconds of outcomes considered
+GEMINI_BREAKER_MIN_CALLS = int(os.getenv('GEMINI_BREAKER_MIN_CALLS', 5))
+GEMINI_BREAKER_ERROR_RATE = float(os.getenv('GEMINI_BREAKER_ERROR_RATE', 0.5))
+GEMINI_BREAKER_COOLDOWN = int(os.getenv('GEMINI_BREAKER_COOLDOWN', 30))
+
+
+class GeminiUnavailable(Exception):
+    """The call was not made or did not finish (circuit open, rate limited, busy, timed out)"""
+
+    def __init__(self, reason, message):
+        super().__init__(message)
+        self.reason = reason
+
+
+class TokenBucket:
+    """Allows `rate` calls per second on average with bursts of `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, timeout):
+        """Take a token, waiting up to timeout seconds; False if none became available"""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate if self.rate > 0 else timeout
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Closed -> open when the error rate over the window is too high;
+    open -> half-open after the cooldown; one trial call closes or reopens it
+    """
+
+    def __init__(self, window, min_calls, error_rate, cooldown):
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.cooldown = cooldown
+        self.outcomes = deque()  # (monotonic time, ok)
+        self.state = 'closed'
+        self.opened_at = 0.0
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.state == 'open':
+                if time.monotonic() - self.opened_at < self.cooldown:
+                    return False
+                self.state = 'half_open'
+            if self.state == 'half_open':
+                if self.trial_running:
+                    return False
+                self.trial_running = True
+            return True
+
+    def record(self, ok):
+        with self.lock:
+            now = time.monotonic()
+            if self.state == 'half_open':
+                self.trial_running = False
+                if ok:
+                    self.state = 'closed'
+                    self.outcomes.clear()
+                else:
+                    self._open(now)
+                return
+
+            self.outcomes.append((now, ok))
+            while self.outcomes and self.outcomes[0][0] < now - self.window:
+                self.outcomes.popleft()
+            failures = sum(1 for _, success in self.outcomes if not success)
+            if len(self.outcomes) >= self.min_calls and failures / len(self.outcomes) >= self.error_rate:
+                self._open(now)
+
+    def _open(self, now):
+        self.state = 'open'
+        self.opened_at = now
+        self.outcomes.clear()
+        print(f"Gemini circuit breaker opened for {self.cooldown}s")
+
+
+class GeminiClient:
+    def __init__(self, model_name=GEMINI_MODEL):
+        self.model_name = model_name
+        self._model = None
+        self._model_lock = threading.Lock()
+        self.bucket = TokenBucket(GEMINI_RATE_PER_MINUTE / 60.0, GEMINI_BURST)
+        self.slots = threading.BoundedSemaphore(GEMINI_MAX_IN_FLIGHT)
+        self.breaker = CircuitBreaker(GEMINI_BREAKER_WINDOW, GEMINI_BREAKER_MIN_CALLS,
+                                      GEMINI_BREAKER_ERROR_RATE, GEMINI_BREAKER_COOLDOWN)
+        self._executor = ThreadPoolExecutor(max_workers=GEMINI_MAX_IN_FLIGHT, thread_name_prefix='gemini')
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'calls': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'timed_out': 0,
+            'rejected_circuit_open': 0,
+            'rejected_rate_limited': 0,
+            'rejected_busy': 0,
+            'in_flight': 0,
+            'total_latency_ms': 0.0,
+            'max_latency_ms': 0.0,
+        }
+
+    def get_model(self):
+        """GenerativeModel, built on first use and shared by all threads"""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _reject(self, reason, message):
+        self._count(f'rejected_{reason}')
+        raise GeminiUnavailable(reason, message)
+
+    def generate(self, prompt, timeout=GEMINI_TIMEOUT):
+        """
+        Text of a generate_content() call
+
+        Raises:
+            GeminiUnavailable: circuit open, rate limited, too many calls in flight or timed out
+            Exception: Errors from the API itself (counted as failures by the breaker)
+        """
+        if not self.breaker.allow():
+            self._reject('circuit_open', 'Gemini circuit breaker is open')
+        if not self.bucket.acquire(GEMINI_QUEUE_TIMEOUT):
+            self._release_trial()
+            self._reject('rate_limited', 'Gemini rate limit reached')
+        if not self.slots.acquire(timeout=GEMINI_QUEUE_TIMEOUT):
+            self._release_trial()
+            self._reject('busy', f'{GEMINI_MAX_IN_FLIGHT} Gemini calls already in flight')
+
+        self._count('calls')
+        self._count('in_flight')
+        start = time.perf_counter()
+        future = self._executor.submit(self._call, prompt)
+        # The slot is freed when the call really ends, even after a timeout,
+        # so abandoned calls still count against the in-flight cap
+        future.add_done_callback(self._finish)
+        try:
+            text = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self._count('timed_out')
+            self.breaker.record(False)
+            raise GeminiUnavailable('timeout', f'Gemini call exceeded {timeout}s')
+        except Exception:
+            self._count('failed')
+            self.breaker.record(False)
+            raise
+
+        latency = (time.perf_counter() - start) * 1000
+        with self._stats_lock:
+            self._stats['succeeded'] += 1
+            self._stats['total_latency_ms'] += latency
+            self._stats['max_latency_ms'] = max(self._stats['max_latency_ms'], latency)
+        self.breaker.record(True)
+        return text
+
+    def _call(self, prompt):
+        return self.get_model().generate_content(prompt).text
+
+    def _finish(self, future):
+        self._count('in_flight', -1)
+        self.slots.release()
+
+    def _release_trial(self):
+        # A half-open trial that never ran must not block the next one
+        with self.breaker.lock:
+            self.breaker.trial_running = False
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['avg_latency_ms'] = round(stats['total_latency_ms'] / stats['succeeded'], 1) if stats['succeeded'] else 0
+        stats['total_latency_ms'] = round(stats['total_latency_ms'], 1)
+        stats['max_latency_ms'] = round(stats['max_latency_ms'], 1)
+        stats['circuit'] = self.breaker.state
+        stats['model'] = self.model_name
+        return stats
+
+
+client = GeminiClient()
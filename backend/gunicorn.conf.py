@@ -0,0 +1,11 @@
+"""
+Gunicorn settings (picked up automatically from the backend directory)
+
+Background threads are started per worker after the app is loaded, not at
+import time, so processes spawned by resume_parser/pdf_reports stay inert.
+"""
+
+
+def post_worker_init(worker):
+    from app import app, init_background
+    init_background(app)
@@ -10,20 +10,21 @@ backend_dir = Path(__file__).parent
 sys.path.insert(0, str(backend_dir))
 
 from database import db
+from migrations import migrate, split_statements
 from werkzeug.security import generate_password_hash
 
 def init_database():
-    """Initialize database with schema and seed data"""
+    """Initialize database with schema, migrations and seed data"""
     try:
         schema_path = Path(__file__).parent.parent / 'database' / 'schema.sql'
         if not schema_path.exists():
             schema_path = Path(__file__).parent.parent.parent / 'database' / 'schema.sql'
 
-        if schema_path.exists():
+        if schema_path.exists() and not schema_exists():
             with open(schema_path, 'r', encoding='utf-8') as f:
                 schema_sql = f.read()
 
-            statements = [s.strip() for s in schema_sql.split(';') if s.strip()]
+            statements = split_statements(schema_sql)
             conn = db.connect()
             try:
                 with conn.cursor() as cursor:
@@ -35,6 +36,7 @@ def init_database():
             finally:
                 conn.close()
 
+        migrate()
         create_default_users()
         print("✓ Database initialized successfully")
 
@@ -42,9 +44,18 @@ def init_database():
         print(f"✗ Database initialization error: {e}")
         raise
 
+def schema_exists():
+    """Check whether the base tables have already been created"""
+    try:
+        result = db.execute_query("SHOW TABLES LIKE 'users'", fetch_one=True)
+        return result is not None
+    except Exception:
+        return False
+    finally:
+        db.release()
+
 def create_default_users():
     """Create default admin, HOD, and student users"""
-    conn = db.get_connection()
     try:
         result = db.execute_query(
             "SELECT COUNT(*) as count FROM users WHERE role = 'tpo'",
@@ -81,8 +92,7 @@ def create_default_users():
     except Exception as e:
         print(f"✗ Error creating default users: {e}")
     finally:
-        if conn:
-            conn.close()
+        db.release()
 
 if __name__ == '__main__':
     # 🔥 Important: Don’t reset DB on Render!
@@ -0,0 +1,259 @@
+"""
+Background job queue
+
+Jobs are rows in the jobs table, so they survive restarts and are shared by
+every gunicorn worker. Each worker process runs a small pool of threads that
+claim queued jobs, run the registered handler and retry failures with
+exponential backoff. Jobs that exhaust their attempts are moved to the
+'dead' status (dead letter) and kept for inspection.
+
+Usage:
+    @job_handler('analyze_resume', max_concurrency=2)
+    def run_analysis(payload):
+        ...
+
+    enqueue('analyze_resume', {'resume_id': 42})
+
+    python jobs.py stats          # queue depth by type and status
+    python jobs.py retry-dead     # move dead jobs back to the queue
+"""
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add backend directory to path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from database import db
+
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+JOB_RETRY_BACKOFF = int(os.getenv('JOB_RETRY_BACKOFF', 10))  # seconds, doubled per attempt
+JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 2))
+JOB_LOCK_TIMEOUT = int(os.getenv('JOB_LOCK_TIMEOUT', 600))  # running jobs older than this are abandoned
+
+_handlers = {}  # job_type -> (func, on_dead, semaphore or None)
+_workers = []
+_wake = threading.Event()
+_stop = threading.Event()
+_last_requeue = 0.0
+
+
+def job_handler(job_type, max_concurrency=None, on_dead=None):
+    """
+    Register a handler for a job type
+
+    Args:
+        job_type: Name used with enqueue()
+        max_concurrency: Max jobs of this type running at once in this process
+        on_dead: Optional callback(payload, error) when the job is dead-lettered
+    """
+    def decorator(func):
+        semaphore = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        _handlers[job_type] = (func, on_dead, semaphore)
+        return func
+    return decorator
+
+
+def enqueue(job_type, payload, max_attempts=None, delay=0):
+    """Queue a job and return its id"""
+    job_id = db.insert(
+        """INSERT INTO jobs (job_type, payload, max_attempts, run_after)
+           VALUES (%s, %s, %s, NOW() + INTERVAL %s SECOND)""",
+        (job_type, json.dumps(payload), max_attempts or JOB_MAX_ATTEMPTS, int(delay))
+    )
+    _wake.set()
+    return job_id
+
+
+def get_job(job_id):
+    return db.execute_query(
+        "SELECT id, job_type, status, attempts, max_attempts, last_error, created_at, updated_at FROM jobs WHERE id = %s",
+        (job_id,),
+        fetch_one=True
+    )
+
+
+def queue_stats():
+    """Job counts by type and status"""
+    rows = db.execute_query(
+        "SELECT job_type, status, COUNT(*) as count FROM jobs GROUP BY job_type, status",
+        fetch_all=True
+    )
+    stats = {}
+    for row in rows or []:
+        stats.setdefault(row['job_type'], {})[row['status']] = row['count']
+    return stats
+
+
+def retry_dead(job_type=None):
+    """Move dead-lettered jobs back to the queue with a fresh attempt budget"""
+    query = "UPDATE jobs SET status = 'queued', attempts = 0, run_after = NOW() WHERE status = 'dead'"
+    params = ()
+    if job_type:
+        query += " AND job_type = %s"
+        params = (job_type,)
+    count = db.execute_query(query, params)
+    _wake.set()
+    return count
+
+
+def _requeue_abandoned():
+    """Retry (or dead-letter) jobs whose worker died while running them"""
+    global _last_requeue
+    if time.monotonic() - _last_requeue < JOB_LOCK_TIMEOUT / 2:
+        return
+    _last_requeue = time.monotonic()
+    abandoned = db.execute_query(
+        """SELECT * FROM jobs
+           WHERE status = 'running' AND locked_at < NOW() - INTERVAL %s SECOND""",
+        (JOB_LOCK_TIMEOUT,),
+        fetch_all=True
+    )
+    # A job that kills its worker (OOM, crashing parser) counts as a failed attempt
+    for job in abandoned or []:
+        _fail(job, 'Worker died while running the job')
+
+
+def _claim(worker_id):
+    """Atomically take one runnable job; returns (job, semaphore) or (None, None)"""
+    job_types = list(_handlers)
+    if not job_types:
+        return None, None
+
+    candidates = db.execute_query(
+        f"""SELECT id, job_type FROM jobs
+            WHERE status = 'queued' AND run_after <= NOW()
+              AND job_type IN ({', '.join(['%s'] * len(job_types))})
+            ORDER BY run_after, id
+            LIMIT 10""",
+        job_types,
+        fetch_all=True
+    )
+    for candidate in candidates or []:
+        semaphore = _handlers[candidate['job_type']][2]
+        if semaphore is not None and not semaphore.acquire(blocking=False):
+            continue
+        try:
+            claimed = db.execute_query(
+                """UPDATE jobs SET status = 'running', locked_by = %s, locked_at = NOW(), attempts = attempts + 1
+                   WHERE id = %s AND status = 'queued'""",
+                (worker_id, candidate['id'])
+            )
+            if claimed:
+                job = db.execute_query("SELECT * FROM jobs WHERE id = %s", (candidate['id'],), fetch_one=True)
+                return job, semaphore
+        except Exception:
+            # The caller never sees the semaphore on errors; don't leak the slot
+            if semaphore is not None:
+                semaphore.release()
+            raise
+        if semaphore is not None:
+            semaphore.release()
+    return None, None
+
+
+def _fail(job, error):
+    """
+    Retry a failed running job with backoff, or dead-letter it once out of attempts
+
+    Only applies while the job is still held by the worker that ran it, so a
+    job another worker has re-claimed in the meantime is left alone.
+    """
+    if job['attempts'] >= job['max_attempts']:
+        moved = db.execute_query(
+            """UPDATE jobs SET status = 'dead', locked_by = NULL, last_error = %s
+               WHERE id = %s AND status = 'running' AND locked_by = %s""",
+            (error, job['id'], job['locked_by'])
+        )
+        if not moved:
+            return
+        print(f"❌ Job {job['id']} ({job['job_type']}) dead after {job['attempts']} attempts: {error}")
+        on_dead = _handlers[job['job_type']][1] if job['job_type'] in _handlers else None
+        if on_dead:
+            on_dead(json.loads(job['payload']), error)
+    else:
+        backoff = JOB_RETRY_BACKOFF * 2 ** (job['attempts'] - 1)
+        moved = db.execute_query(
+            """UPDATE jobs SET status = 'queued', locked_by = NULL, last_error = %s,
+                              run_after = NOW() + INTERVAL %s SECOND
+               WHERE id = %s AND status = 'running' AND locked_by = %s""",
+            (error, backoff, job['id'], job['locked_by'])
+        )
+        if moved:
+            print(f"⚠️ Job {job['id']} ({job['job_type']}) failed, retrying in {backoff}s: {error}")
+
+
+def _run(job):
+    func = _handlers[job['job_type']][0]
+    try:
+        func(json.loads(job['payload']))
+    except Exception as e:
+        _fail(job, f"{type(e).__name__}: {e}")
+        return
+
+    db.execute_query(
+        "UPDATE jobs SET status = 'done', locked_by = NULL, last_error = NULL WHERE id = %s",
+        (job['id'],)
+    )
+
+
+def _worker_loop(worker_id):
+    while not _stop.is_set():
+        job = semaphore = None
+        try:
+            _requeue_abandoned()
+            job, semaphore = _claim(worker_id)
+            if job:
+                _run(job)
+        except Exception as e:
+            print(f"❌ Job worker {worker_id} error: {e}")
+            time.sleep(JOB_POLL_INTERVAL)
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+            db.release()
+
+        if job is None:
+            _wake.wait(JOB_POLL_INTERVAL)
+            _wake.clear()
+
+
+def start_workers(count=JOB_WORKERS):
+    """Start the worker threads for this process (idempotent)"""
+    if _workers or count <= 0:
+        return
+    prefix = f"{socket.gethostname()}:{os.getpid()}"
+    for i in range(count):
+        thread = threading.Thread(target=_worker_loop, args=(f"{prefix}:{i}",), name=f"job-worker-{i}", daemon=True)
+        thread.start()
+        _workers.append(thread)
+    print(f"✅ Started {count} background job worker(s)")
+
+
+def stop_workers(timeout=5):
+    _stop.set()
+    _wake.set()
+    for thread in _workers:
+        thread.join(timeout)
+    _workers.clear()
+    _stop.clear()
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    try:
+        if command == 'stats':
+            print(json.dumps(queue_stats(), indent=2))
+        elif command == 'retry-dead':
+            print(f"✓ Re-queued {retry_dead(sys.argv[2] if len(sys.argv) > 2 else None)} dead job(s)")
+        else:
+            print(__doc__)
+            sys.exit(2)
+    finally:
+        db.close()
@@ -0,0 +1,394 @@
+"""
+Outgoing email queue
+
+Emails are rows in email_outbox, inserted in the same transaction as the
+change they announce, so requests never wait on Gemini or SMTP and no email
+is lost if the process dies. Every process runs a sender thread, but only the
+one holding the email_outbox_lease row sends, so MAIL_RATE_PER_MINUTE is the
+rate of the whole deployment. The sender claims due messages in batches,
+renders templated ones, then sends the batch over one SMTP connection
+(Flask-Mail mail.connect()) throttled to MAIL_RATE_PER_MINUTE. Failures are
+retried with exponential backoff; messages that exhaust their attempts are
+marked 'dead' and kept for inspection.
+
+Usage:
+    queue_email('student@example.com', 'Subject', 'Body')
+    queue_template('student@example.com', 'application_update', {...})
+
+    python mail_outbox.py stats         # queue depth by status
+    python mail_outbox.py retry-dead    # move dead messages back to the queue
+"""
+import json
+import os
+import smtplib
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add backend directory to path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from database import db
+
+OUTBOX_SENDER = os.getenv('OUTBOX_SENDER', 'True').lower() == 'true'
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', 50))  # messages per SMTP connection
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 5))
+OUTBOX_RETRY_BACKOFF = int(os.getenv('OUTBOX_RETRY_BACKOFF', 60))  # seconds, doubled per attempt
+OUTBOX_POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', 5))
+OUTBOX_LOCK_TIMEOUT = int(os.getenv('OUTBOX_LOCK_TIMEOUT', 900))  # 'sending' rows older than this are re-queued
+OUTBOX_LEASE_SECONDS = int(os.getenv('OUTBOX_LEASE_SECONDS', 60))  # sender lease, renewed while sending
+MAIL_RATE_PER_MINUTE = float(os.getenv('MAIL_RATE_PER_MINUTE', 60))  # across all processes
+
+# The connection itself is broken; the rest of the batch goes back to the queue
+CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, socket.timeout)
+
+_sender = None
+_sender_id = None
+_lease_renewed_at = 0.0
+_wake = threading.Event()
+_stop = threading.Event()
+
+
+def queue_email(to, subject, body, html_body=None, attachments=None):
+    """Queue a ready-made email and return its outbox id"""
+    message_id = db.insert(
+        """INSERT INTO email_outbox (recipient, subject, body, html_body, attachments, max_attempts)
+           VALUES (%s, %s, %s, %s, %s, %s)""",
+        (to, subject, body, html_body, json.dumps(attachments) if attachments else None, OUTBOX_MAX_ATTEMPTS)
+    )
+    _wake.set()
+    return message_id
+
+
+def queue_template(to, template, context, attachments=None):
+    """Queue an email rendered by the sender from a mail_utils.EMAIL_TEMPLATES entry"""
+    message_id = db.insert(
+        """INSERT INTO email_outbox (recipient, template, context, attachments, max_attempts)
+           VALUES (%s, %s, %s, %s, %s)""",
+        (to, template, json.dumps(context), json.dumps(attachments) if attachments else None, OUTBOX_MAX_ATTEMPTS)
+    )
+    _wake.set()
+    return message_id
+
+
+def queue_templates(template, messages):
+    """
+    Queue many templated emails with one multi-row INSERT
+
+    Args:
+        template: mail_utils.EMAIL_TEMPLATES name
+        messages: list of (to, context, attachments or None)
+
+    Returns:
+        Number of messages queued
+    """
+    count = db.executemany(
+        """INSERT INTO email_outbox (recipient, template, context, attachments, max_attempts)
+           VALUES (%s, %s, %s, %s, %s)""",
+        [
+            (to, template, json.dumps(context), json.dumps(attachments) if attachments else None, OUTBOX_MAX_ATTEMPTS)
+            for to, context, attachments in messages
+        ]
+    )
+    _wake.set()
+    return count
+
+
+def queue_stats():
+    """Message counts by status and the age of the oldest due message"""
+    rows = db.execute_query(
+        "SELECT status, COUNT(*) as count FROM email_outbox GROUP BY status",
+        fetch_all=True
+    )
+    stats = {status: 0 for status in ('queued', 'sending', 'sent', 'dead')}
+    for row in rows or []:
+        stats[row['status']] = row['count']
+    oldest = db.execute_query(
+        """SELECT TIMESTAMPDIFF(SECOND, MIN(send_after), NOW()) as age FROM email_outbox
+           WHERE status = 'queued' AND send_after <= NOW()""",
+        fetch_one=True
+    )
+    stats['oldest_due_seconds'] = (oldest['age'] if oldest else None) or 0
+    stats['rate_per_minute'] = MAIL_RATE_PER_MINUTE
+    lease = db.execute_query(
+        "SELECT holder FROM email_outbox_lease WHERE id = 1 AND expires_at > NOW()",
+        fetch_one=True
+    )
+    stats['sender'] = lease['holder'] if lease else None
+    return stats
+
+
+def retry_dead():
+    """Move dead messages back to the queue with a fresh attempt budget"""
+    count = db.execute_query(
+        "UPDATE email_outbox SET status = 'queued', attempts = 0, send_after = NOW() WHERE status = 'dead'"
+    )
+    _wake.set()
+    return count
+
+
+def _requeue_abandoned():
+    count = db.execute_query(
+        """UPDATE email_outbox SET status = 'queued', locked_by = NULL, locked_at = NULL
+           WHERE status = 'sending' AND locked_at < NOW() - INTERVAL %s SECOND""",
+        (OUTBOX_LOCK_TIMEOUT,)
+    )
+    if count:
+        print(f"⚠️ Re-queued {count} abandoned email(s)")
+
+
+def _hold_lease(sender_id):
+    """
+    Take or renew the sender lease; True while this process is the sender
+
+    Renewed once a third of the lease has passed, so calling it per message is cheap.
+    """
+    global _lease_renewed_at
+    if time.monotonic() - _lease_renewed_at < OUTBOX_LEASE_SECONDS / 3:
+        return True
+    db.execute_query(
+        """UPDATE email_outbox_lease SET holder = %s, expires_at = NOW() + INTERVAL %s SECOND
+           WHERE id = 1 AND (holder = %s OR holder IS NULL OR expires_at < NOW())""",
+        (sender_id, OUTBOX_LEASE_SECONDS, sender_id)
+    )
+    row = db.execute_query("SELECT holder FROM email_outbox_lease WHERE id = 1", fetch_one=True)
+    if row and row['holder'] == sender_id:
+        _lease_renewed_at = time.monotonic()
+        return True
+    _lease_renewed_at = 0.0
+    return False
+
+
+def _release_lease(sender_id):
+    global _lease_renewed_at
+    _lease_renewed_at = 0.0
+    db.execute_query(
+        "UPDATE email_outbox_lease SET holder = NULL, expires_at = NULL WHERE id = 1 AND holder = %s",
+        (sender_id,)
+    )
+
+
+def _claim_batch(sender_id, limit=OUTBOX_BATCH_SIZE):
+    """Atomically take up to `limit` due messages"""
+    candidates = db.execute_query(
+        """SELECT id FROM email_outbox
+           WHERE status = 'queued' AND send_after <= NOW()
+           ORDER BY send_after, id
+           LIMIT %s""",
+        (limit,),
+        fetch_all=True
+    )
+    if not candidates:
+        return []
+    ids = [row['id'] for row in candidates]
+    placeholders = ', '.join(['%s'] * len(ids))
+    db.execute_query(
+        f"""UPDATE email_outbox SET status = 'sending', locked_by = %s, locked_at = NOW(), attempts = attempts + 1
+            WHERE id IN ({placeholders}) AND status = 'queued'""",
+        (sender_id, *ids)
+    )
+    # Another sender may have claimed some of them first
+    return db.execute_query(
+        f"""SELECT * FROM email_outbox
+            WHERE id IN ({placeholders}) AND status = 'sending' AND locked_by = %s
+            ORDER BY id""",
+        (*ids, sender_id),
+        fetch_all=True
+    ) or []
+
+
+def _render(message):
+    """Fill in subject/body of a templated message (stored so retries do not re-render)"""
+    if message['body'] is not None or not message['template']:
+        return message
+    from mail_utils import EMAIL_TEMPLATES
+
+    rendered = EMAIL_TEMPLATES[message['template']](**json.loads(message['context'] or '{}'))
+    message.update(rendered)
+    db.execute_query(
+        "UPDATE email_outbox SET subject = %s, body = %s, html_body = %s WHERE id = %s",
+        (rendered['subject'], rendered['body'], rendered.get('html_body'), message['id'])
+    )
+    return message
+
+
+def _build(message):
+    from flask_mail import Message
+
+    msg = Message(
+        subject=message['subject'],
+        recipients=[message['recipient']],
+        body=message['body'],
+        html=message['html_body']
+    )
+    for attachment_path in json.loads(message['attachments'] or '[]'):
+        with open(attachment_path, 'rb') as f:
+            msg.attach(
+                filename=os.path.basename(attachment_path),
+                content_type='application/octet-stream',
+                data=f.read()
+            )
+    return msg
+
+
+def _mark_sent(message):
+    db.execute_query(
+        "UPDATE email_outbox SET status = 'sent', locked_by = NULL, last_error = NULL, sent_at = NOW() WHERE id = %s",
+        (message['id'],)
+    )
+
+
+def _mark_failed(message, error):
+    if message['attempts'] >= message['max_attempts']:
+        print(f"❌ Email {message['id']} to {message['recipient']} dead after {message['attempts']} attempts: {error}")
+        db.execute_query(
+            "UPDATE email_outbox SET status = 'dead', locked_by = NULL, last_error = %s WHERE id = %s",
+            (error, message['id'])
+        )
+    else:
+        backoff = OUTBOX_RETRY_BACKOFF * 2 ** (message['attempts'] - 1)
+        db.execute_query(
+            """UPDATE email_outbox SET status = 'queued', locked_by = NULL, last_error = %s,
+                                      send_after = NOW() + INTERVAL %s SECOND
+               WHERE id = %s""",
+            (error, backoff, message['id'])
+        )
+
+
+def _release(messages):
+    """Put claimed but unsent messages back without using up an attempt"""
+    for message in messages:
+        db.execute_query(
+            """UPDATE email_outbox SET status = 'queued', locked_by = NULL, attempts = attempts - 1
+               WHERE id = %s AND status = 'sending'""",
+            (message['id'],)
+        )
+
+
+def send_batch(messages, sender_id):
+    """
+    Render claimed messages, then send them over one SMTP connection (needs an
+    app context). Stops early, returning the rest to the queue, if this
+    process loses the sender lease.
+
+    Returns:
+        Number of messages sent
+    """
+    from mail_utils import mail
+
+    # Render first: a slow Gemini call must not hold the SMTP connection open into its idle timeout
+    ready = []
+    for index, message in enumerate(messages):
+        if _stop.is_set() or not _hold_lease(sender_id):
+            _release(ready + messages[index:])
+            return 0
+        try:
+            ready.append(_render(message))
+        except Exception as e:
+            _mark_failed(message, f"{type(e).__name__}: {e}")
+    if not ready:
+        return 0
+
+    interval = 60.0 / MAIL_RATE_PER_MINUTE if MAIL_RATE_PER_MINUTE > 0 else 0
+    sent = 0
+    try:
+        with mail.connect() as connection:
+            for index, message in enumerate(ready):
+                if _stop.is_set() or not _hold_lease(sender_id):
+                    _release(ready[index:])
+                    break
+                started = time.monotonic()
+                try:
+                    connection.send(_build(message))
+                except CONNECTION_ERRORS as e:
+                    _mark_failed(message, f"{type(e).__name__}: {e}")
+                    _release(ready[index + 1:])
+                    break
+                except Exception as e:
+                    _mark_failed(message, f"{type(e).__name__}: {e}")
+                else:
+                    _mark_sent(message)
+                    sent += 1
+                # Throttle to the provider's limit
+                remaining = interval - (time.monotonic() - started)
+                if remaining > 0:
+                    _stop.wait(remaining)
+    except Exception as e:
+        # Could not connect/log in: every message claimed but not yet handled gets retried
+        print(f"❌ SMTP connection error: {e}")
+        for message in ready:
+            row = db.execute_query("SELECT status FROM email_outbox WHERE id = %s", (message['id'],), fetch_one=True)
+            if row and row['status'] == 'sending':
+                _mark_failed(message, f"{type(e).__name__}: {e}")
+    return sent
+
+
+def _sender_loop(app, sender_id):
+    last_requeue = 0.0
+    while not _stop.is_set():
+        messages = []
+        try:
+            if not _hold_lease(sender_id):
+                # Another process is the sender
+                _stop.wait(OUTBOX_LEASE_SECONDS / 3)
+                continue
+            if time.monotonic() - last_requeue > OUTBOX_LOCK_TIMEOUT / 2:
+                last_requeue = time.monotonic()
+                _requeue_abandoned()
+            messages = _claim_batch(sender_id)
+            if messages:
+                with app.app_context():
+                    sent = send_batch(messages, sender_id)
+                print(f"📧 Sent {sent}/{len(messages)} queued email(s)")
+        except Exception as e:
+            print(f"❌ Email sender error: {e}")
+            time.sleep(OUTBOX_POLL_INTERVAL)
+        finally:
+            db.release()
+
+        if not messages:
+            _wake.wait(OUTBOX_POLL_INTERVAL)
+            _wake.clear()
+
+
+def start_sender(app):
+    """Start this process's sender thread (idempotent; disabled with OUTBOX_SENDER=False)"""
+    global _sender, _sender_id
+    if _sender is not None or not OUTBOX_SENDER:
+        return
+    _sender_id = f"{socket.gethostname()}:{os.getpid()}:mail"
+    _sender = threading.Thread(target=_sender_loop, args=(app, _sender_id), name='mail-sender', daemon=True)
+    _sender.start()
+    print("✅ Started email outbox sender")
+
+
+def stop_sender(timeout=5):
+    global _sender
+    _stop.set()
+    _wake.set()
+    if _sender is not None:
+        _sender.join(timeout)
+        try:
+            # Let another process take over without waiting for the lease to expire
+            _release_lease(_sender_id)
+        finally:
+            db.release()
+    _sender = None
+    _stop.clear()
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    try:
+        if command == 'stats':
+            print(json.dumps(queue_stats(), indent=2))
+        elif command == 'retry-dead':
+            print(f"✓ Re-queued {retry_dead()} dead email(s)")
+        else:
+            print(__doc__)
+            sys.exit(2)
+    finally:
+        db.close()
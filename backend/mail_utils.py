@@ -1,8 +1,7 @@
 """
 Email utility functions using Flask-Mail
 """
-from flask_mail import Mail, Message
-from flask import current_app
+from flask_mail import Mail
 import os
 
 mail = Mail()
@@ -18,60 +17,19 @@ def init_mail(app):
     
     mail.init_app(app)
 
-def send_email(to, subject, body, html_body=None, attachments=None):
+def compose_application_update_email(student_name, company_name, job_role, status):
     """
-    Send an email
-    
-    Args:
-        to: Recipient email address
-        subject: Email subject
-        body: Plain text body
-        html_body: Optional HTML body
-        attachments: List of attachment file paths
+    Subject and bodies of an application status update email
     
     Returns:
-        True if sent successfully, False otherwise
-    """
-    try:
-        msg = Message(
-            subject=subject,
-            recipients=[to],
-            body=body,
-            html=html_body
-        )
-        
-        if attachments:
-            for attachment_path in attachments:
-                with current_app.open_resource(attachment_path) as f:
-                    msg.attach(
-                        filename=os.path.basename(attachment_path),
-                        content_type='application/octet-stream',
-                        data=f.read()
-                    )
-        
-        mail.send(msg)
-        return True
-    except Exception as e:
-        print(f"Email sending error: {e}")
-        return False
-
-def send_application_update_email(student_email, student_name, company_name, job_role, status, offer_letter_path=None):
-    """
-    Send application status update email to student
-    
-    Args:
-        student_email: Student's email
-        student_name: Student's name
-        company_name: Company name
-        job_role: Job role
-        status: Application status
-        offer_letter_path: Optional path to offer letter attachment
+        dict with subject, body, html_body
     """
-    from gemini_ai import generate_email_content
+    from email_templates import render_email
     
     email_type = 'offer' if status == 'Selected' else ('shortlist' if status == 'Shortlisted' else 'rejection')
     
-    email_content = generate_email_content(
+    # One generated template per (type, company, role), personalized locally
+    email_content = render_email(
         email_type=email_type,
         recipient_name=student_name,
         company_name=company_name,
@@ -96,13 +54,69 @@ def send_application_update_email(student_email, student_name, company_name, job
     </html>
     """
     
+    return {
+        'subject': email_content['subject'],
+        'body': email_content['body'],
+        'html_body': html_body
+    }
+
+# Templates the outbox sender can render: name -> function(**context)
+EMAIL_TEMPLATES = {
+    'application_update': compose_application_update_email,
+}
+
+def send_application_update_email(student_email, student_name, company_name, job_role, status, offer_letter_path=None):
+    """
+    Queue an application status update email to a student
+    
+    The email is composed and sent by the outbox sender, so this only inserts
+    a row; call it inside the transaction that changes the status.
+    
+    Args:
+        student_email: Student's email
+        student_name: Student's name
+        company_name: Company name
+        job_role: Job role
+        status: Application status
+        offer_letter_path: Optional path to offer letter attachment
+    
+    Returns:
+        Outbox message id
+    """
+    from mail_outbox import queue_template
+    
     attachments = [offer_letter_path] if offer_letter_path and os.path.exists(offer_letter_path) else None
     
-    return send_email(
+    return queue_template(
         to=student_email,
-        subject=email_content['subject'],
-        body=email_content['body'],
-        html_body=html_body,
+        template='application_update',
+        context=application_update_context(student_name, company_name, job_role, status),
         attachments=attachments
     )
 
+def send_application_update_emails(applications, status):
+    """
+    Queue status update emails for many applications in one insert
+    
+    Args:
+        applications: dicts with email, student_name, company_name, job_role
+        status: New application status
+    
+    Returns:
+        Number of emails queued
+    """
+    from mail_outbox import queue_templates
+    
+    return queue_templates('application_update', [
+        (a['email'], application_update_context(a['student_name'], a['company_name'], a['job_role'], status), None)
+        for a in applications
+    ])
+
+def application_update_context(student_name, company_name, job_role, status):
+    """Outbox context rendered by compose_application_update_email"""
+    return {
+        'student_name': student_name,
+        'company_name': company_name,
+        'job_role': job_role,
+        'status': status
+    }
@@ -0,0 +1,200 @@
+"""
+Versioned schema migrations
+
+Migrations live in database/migrations as NNN_description.sql and are
+applied in order. Applied versions are recorded in schema_migrations, so
+running this against a live database only applies what is missing.
+
+Usage:
+    python migrations.py            # apply pending migrations
+    python migrations.py status     # list applied / pending migrations
+    python migrations.py check      # EXPLAIN the hot queries, fail on full table scans
+"""
+import re
+import sys
+from pathlib import Path
+
+# Add backend directory to path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from database import db
+from stats_service import TPO_STATS_QUERY, HOD_STATS_QUERY
+
+# MySQL errors that mean a statement was already applied (e.g. after a partial run)
+ALREADY_APPLIED_ERRORS = {
+    1050,  # Table already exists
+    1060,  # Duplicate column name
+    1061,  # Duplicate key name
+    1091,  # Can't DROP; index or column doesn't exist
+    1826,  # Duplicate foreign key constraint name
+}
+
+# Queries run on every dashboard load, with representative parameters
+HOT_QUERIES = [
+    ('student_dashboard: active drives',
+     "SELECT * FROM drives WHERE status = 'active' AND last_date >= CURDATE() ORDER BY last_date ASC", None),
+    ('student_dashboard: applications',
+     """SELECT a.*, d.company_name, d.job_role, d.last_date
+        FROM applications a
+        JOIN drives d ON a.drive_id = d.id
+        WHERE a.student_id = %s
+        ORDER BY a.applied_at DESC""", (1,)),
+    ('student_dashboard: latest resume',
+     "SELECT * FROM resumes WHERE user_id = %s ORDER BY analyzed_at DESC LIMIT 1", (1,)),
+    ('student_dashboard: unread notifications',
+     "SELECT * FROM notifications WHERE user_id = %s AND is_read = FALSE ORDER BY created_at DESC LIMIT 10", (1,)),
+    ('hod_dashboard: pending students',
+     "SELECT * FROM users WHERE role = 'student' AND department = %s AND is_approved = FALSE", ('Computer Science',)),
+    ('hod_dashboard: student counts', HOD_STATS_QUERY, ('Computer Science',)),
+    ('hod_dashboard: department applications',
+     """SELECT a.*, u.name as student_name, u.email, d.company_name, d.job_role
+        FROM applications a
+        JOIN users u ON a.student_id = u.id
+        JOIN drives d ON a.drive_id = d.id
+        WHERE u.department = %s
+        ORDER BY a.applied_at DESC
+        LIMIT 20""", ('Computer Science',)),
+    ('tpo_dashboard: counters', TPO_STATS_QUERY, None),
+    ('tpo_dashboard: recent drives',
+     "SELECT * FROM drives ORDER BY created_at DESC LIMIT 10", None),
+    ('tpo_dashboard: recent applications',
+     """SELECT a.*, u.name as student_name, u.email, d.company_name, d.job_role
+        FROM applications a
+        JOIN users u ON a.student_id = u.id
+        JOIN drives d ON a.drive_id = d.id
+        ORDER BY a.applied_at DESC
+        LIMIT 20""", None),
+]
+
+
+def get_migrations_dir():
+    """Locate database/migrations relative to the backend directory"""
+    migrations_dir = Path(__file__).parent.parent / 'database' / 'migrations'
+    if not migrations_dir.exists():
+        migrations_dir = Path(__file__).parent.parent.parent / 'database' / 'migrations'
+    return migrations_dir
+
+
+def load_migrations():
+    """Return [(version, name, path)] sorted by version"""
+    migrations = []
+    for path in get_migrations_dir().glob('*.sql'):
+        match = re.match(r'^(\d+)_(.+)\.sql$', path.name)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), path))
+    return sorted(migrations)
+
+
+def split_statements(sql):
+    """Split a SQL file into statements, dropping -- comments"""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    return [s.strip() for s in '\n'.join(lines).split(';') if s.strip()]
+
+
+def ensure_migrations_table():
+    db.execute_query(
+        """CREATE TABLE IF NOT EXISTS schema_migrations (
+               version INT PRIMARY KEY,
+               name VARCHAR(255) NOT NULL,
+               applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+           )"""
+    )
+
+
+def get_applied_versions():
+    ensure_migrations_table()
+    rows = db.execute_query("SELECT version FROM schema_migrations", fetch_all=True)
+    return {row['version'] for row in rows or []}
+
+
+def apply_migration(version, name, path):
+    """Run one migration file and record it"""
+    with open(path, 'r', encoding='utf-8') as f:
+        statements = split_statements(f.read())
+
+    for statement in statements:
+        try:
+            db.execute_query(statement)
+        except Exception as e:
+            code = e.args[0] if e.args else None
+            if code in ALREADY_APPLIED_ERRORS:
+                print(f"  - already applied, skipping: {statement.splitlines()[0][:80]}")
+                continue
+            raise
+
+    db.execute_query(
+        "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+        (version, name)
+    )
+
+
+def migrate():
+    """Apply all pending migrations in order"""
+    applied = get_applied_versions()
+    pending = [m for m in load_migrations() if m[0] not in applied]
+
+    if not pending:
+        print("✓ Database schema is up to date")
+        return []
+
+    for version, name, path in pending:
+        print(f"Applying migration {version:03d}_{name}...")
+        apply_migration(version, name, path)
+        print(f"✓ Migration {version:03d}_{name} applied")
+    return [m[0] for m in pending]
+
+
+def status():
+    """Print applied and pending migrations"""
+    applied = get_applied_versions()
+    for version, name, _ in load_migrations():
+        mark = '✓' if version in applied else ' '
+        print(f"[{mark}] {version:03d}_{name}")
+
+
+def find_full_scans(plan_rows):
+    """Return the tables a plan reads with a full table scan (MySQL and TiDB formats)"""
+    scanned = []
+    for row in plan_rows:
+        if row.get('type') == 'ALL' and not str(row.get('table', '')).startswith('<'):
+            scanned.append(row.get('table'))
+        elif 'TableFullScan' in str(row.get('id', '')):
+            scanned.append(row.get('access object') or row.get('id'))
+    return scanned
+
+
+def check_query_plans(queries=HOT_QUERIES):
+    """
+    EXPLAIN every hot query
+
+    Returns:
+        List of (query name, [tables scanned]) for queries doing full table scans
+    """
+    failures = []
+    for name, query, params in queries:
+        plan = db.execute_query(f"EXPLAIN {query}", params, fetch_all=True)
+        scanned = find_full_scans(plan or [])
+        if scanned:
+            failures.append((name, scanned))
+            print(f"✗ {name}: full table scan on {', '.join(str(t) for t in scanned)}")
+        else:
+            print(f"✓ {name}")
+    return failures
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'migrate'
+    try:
+        if command == 'migrate':
+            migrate()
+        elif command == 'status':
+            status()
+        elif command == 'check':
+            if check_query_plans():
+                sys.exit(1)
+        else:
+            print(__doc__)
+            sys.exit(2)
+    finally:
+        db.close()
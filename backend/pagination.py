@@ -0,0 +1,82 @@
+"""
+Keyset (cursor) pagination helpers for the JSON APIs
+
+Pages are ordered by (timestamp DESC, id DESC). The cursor is the sort key
+of the last row on the previous page, so every page is an index range
+scan starting right after it; deep pages cost the same as the first one,
+unlike OFFSET.
+"""
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue"""
+
+
+def encode_cursor(timestamp, row_id):
+    """Opaque cursor for the row (timestamp, id)"""
+    raw = json.dumps([timestamp.isoformat(), row_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (timestamp, id) from a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except Exception:
+        raise InvalidCursor('Invalid cursor')
+
+
+def parse_limit(value):
+    """Clamp the requested page size to 1..MAX_PAGE_SIZE"""
+    try:
+        limit = int(value) if value else DEFAULT_PAGE_SIZE
+    except ValueError:
+        limit = DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def keyset_condition(time_column, id_column):
+    """WHERE clause selecting rows after the cursor in (time DESC, id DESC) order"""
+    return f"({time_column} < %s OR ({time_column} = %s AND {id_column} < %s))"
+
+
+def keyset_params(timestamp, row_id):
+    return [timestamp, timestamp, row_id]
+
+
+def serialize_row(row):
+    """Make a DB row JSON-friendly (ISO dates, plain numbers)"""
+    result = {}
+    for key, value in row.items():
+        if isinstance(value, (datetime, date)):
+            value = value.isoformat()
+        elif isinstance(value, Decimal):
+            value = float(value)
+        result[key] = value
+    return result
+
+
+def build_page(rows, limit, time_key, id_key='id'):
+    """
+    Turn limit + 1 fetched rows into a page response
+
+    Returns:
+        dict with items, next_cursor (None on the last page) and has_more
+    """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(rows[-1][time_key], rows[-1][id_key]) if has_more and rows else None
+    return {
+        'items': [serialize_row(row) for row in rows],
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+    }
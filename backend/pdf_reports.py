@@ -0,0 +1,431 @@
+"""
+PDF placement reports
+
+Renders per-student placement certificates (students with a 'Selected'
+application) and a per-department summary with reportlab. Rows are read
+in the request process, STUDENT_PAGE students per query, each page fetched
+whole, so no server-side cursor waits on a slow download (MySQL would abort
+it after net_write_timeout). Rendering is CPU-bound, so
+documents are drawn in a spawned process pool, in batches, with a bounded
+number of batches in flight. The pool is shared by every export of the
+process and started on first use. Finished PDFs are written into a zip as they
+arrive, and the zip is streamed to the client while the rest render, so
+memory stays flat for thousands of pages. The last member, summary.json,
+records documents, pages and pages/second.
+
+Usage:
+    chunks = generate_zip(department='Computer Science')
+    next(chunks)  # raises PdfBusy when too many exports are running
+    return Response(stream_with_context(chunks), mimetype='application/zip', ...)
+
+    python pdf_reports.py render [--department NAME] [--workers N] [--out FILE]
+    python pdf_reports.py bench [--students N] [--workers N]    # synthetic data, no database
+"""
+import json
+import multiprocessing
+import os
+import re
+import sys
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date
+from io import BytesIO
+from pathlib import Path
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+# Add backend directory to path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from database import db
+
+COLLEGE_NAME = os.getenv('COLLEGE_NAME', 'College Placement Cell')
+PDF_WORKERS = int(os.getenv('PDF_WORKERS', 0)) or os.cpu_count() or 1
+PDF_MAX_JOBS = int(os.getenv('PDF_MAX_JOBS', 1))  # concurrent PDF exports per process
+
+# Certificates per worker task (amortizes pickling and process round trips)
+CERTIFICATE_BATCH = 50
+# Batches in flight per worker; bounds memory held in unfinished futures
+IN_FLIGHT_PER_WORKER = 4
+SUMMARY_ROWS_PER_PAGE = 38
+# Students whose rows are read per query
+STUDENT_PAGE = 500
+
+STUDENT_IDS_QUERY = """
+    SELECT u.id FROM users u
+    WHERE u.role = 'student' {where}
+    ORDER BY u.department, u.id
+"""
+
+STUDENT_ROWS_QUERY = """
+    SELECT u.id, u.name, u.email, u.department, d.company_name, d.job_role, a.status, a.updated_at
+    FROM users u
+    LEFT JOIN applications a ON a.student_id = u.id
+    LEFT JOIN drives d ON a.drive_id = d.id
+    WHERE u.id IN ({ids})
+    ORDER BY u.department, u.id, a.id
+"""
+
+_jobs = threading.BoundedSemaphore(PDF_MAX_JOBS)
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class PdfBusy(RuntimeError):
+    """PDF_MAX_JOBS exports are already running in this process"""
+
+
+def _slug(value):
+    return re.sub(r'[^A-Za-z0-9]+', '_', value or 'Unassigned').strip('_') or 'Unassigned'
+
+# ==================== Rendering (runs in worker processes) ====================
+
+def render_certificate(student, issued_on):
+    """One-page placement certificate; returns (pdf bytes, page count)"""
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+
+    pdf.setLineWidth(3)
+    pdf.rect(36, 36, width - 72, height - 72)
+    pdf.setLineWidth(1)
+    pdf.rect(44, 44, width - 88, height - 88)
+
+    pdf.setFont('Helvetica-Bold', 16)
+    pdf.drawCentredString(width / 2, height - 110, COLLEGE_NAME)
+    pdf.setFont('Helvetica-Bold', 28)
+    pdf.drawCentredString(width / 2, height - 170, 'Placement Certificate')
+
+    pdf.setFont('Helvetica', 13)
+    pdf.drawCentredString(width / 2, height - 240, 'This is to certify that')
+    pdf.setFont('Helvetica-Bold', 22)
+    pdf.drawCentredString(width / 2, height - 280, student['name'])
+    pdf.setFont('Helvetica', 12)
+    pdf.drawCentredString(width / 2, height - 305, f"{student['department'] or 'Unassigned'}  |  {student['email']}")
+    pdf.setFont('Helvetica', 13)
+    pdf.drawCentredString(width / 2, height - 350, 'has been selected through campus placement by')
+
+    y = height - 390
+    for offer in student['offers'][:8]:
+        pdf.setFont('Helvetica-Bold', 15)
+        pdf.drawCentredString(width / 2, y, f"{offer['company_name']} - {offer['job_role']}")
+        y -= 26
+
+    pdf.setFont('Helvetica', 11)
+    pdf.drawString(80, 110, f"Issued on {issued_on}")
+    pdf.line(width - 260, 125, width - 80, 125)
+    pdf.drawCentredString(width - 170, 110, 'Training & Placement Officer')
+
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue(), 1
+
+
+def render_department_summary(department, students, issued_on):
+    """Department placement summary, paginated; returns (pdf bytes, page count)"""
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+
+    placed = sum(1 for s in students if s['offers'])
+    applications = sum(s['applications'] for s in students)
+    rate = placed / len(students) * 100 if students else 0
+    columns = [(50, 'Student'), (210, 'Email'), (390, 'Apps'), (430, 'Placed At')]
+
+    def header(first):
+        y = height - 60
+        pdf.setFont('Helvetica-Bold', 16)
+        pdf.drawString(50, y, f"{COLLEGE_NAME} - {department or 'Unassigned'}")
+        y -= 20
+        pdf.setFont('Helvetica', 10)
+        pdf.drawString(50, y, f"Placement summary as of {issued_on}")
+        if first:
+            y -= 28
+            pdf.setFont('Helvetica-Bold', 11)
+            pdf.drawString(50, y, f"Students: {len(students)}    Placed: {placed}    "
+                                  f"Placement rate: {rate:.1f}%    Applications: {applications}")
+        y -= 28
+        pdf.setFont('Helvetica-Bold', 10)
+        for x, title in columns:
+            pdf.drawString(x, y, title)
+        pdf.line(50, y - 4, width - 50, y - 4)
+        return y - 18
+
+    def footer():
+        pdf.setFont('Helvetica', 9)
+        pdf.drawRightString(width - 50, 30, f"Page {pdf.getPageNumber()}")
+
+    y = header(True)
+    rows_on_page = 0
+    for student in students:
+        if rows_on_page == SUMMARY_ROWS_PER_PAGE or y < 60:
+            footer()
+            pdf.showPage()
+            y = header(False)
+            rows_on_page = 0
+        companies = ', '.join(offer['company_name'] for offer in student['offers']) or '-'
+        pdf.setFont('Helvetica', 9)
+        pdf.drawString(50, y, student['name'][:30])
+        pdf.drawString(210, y, student['email'][:34])
+        pdf.drawString(390, y, str(student['applications']))
+        pdf.drawString(430, y, companies[:34])
+        y -= 15
+        rows_on_page += 1
+
+    footer()
+    pages = pdf.getPageNumber()
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue(), pages
+
+
+def _render_task(task):
+    """Worker entry point; returns a list of (zip member name, pdf bytes, pages)"""
+    kind, payload, issued_on = task
+    if kind == 'summary':
+        department, students = payload
+        data, pages = render_department_summary(department, students, issued_on)
+        return [(f"summaries/{_slug(department)}_summary.pdf", data, pages)]
+    documents = []
+    for student in payload:
+        data, pages = render_certificate(student, issued_on)
+        documents.append((f"certificates/{_slug(student['department'])}/{student['id']}_{_slug(student['name'])}.pdf",
+                          data, pages))
+    return documents
+
+# ==================== Task generation ====================
+
+def student_rows(department=None):
+    """Student/application rows ordered by department and student, STUDENT_PAGE students per query"""
+    where = "AND u.department = %s" if department is not None else ""
+    params = (department,) if department is not None else None
+    students = db.execute_query(STUDENT_IDS_QUERY.format(where=where), params, fetch_all=True) or []
+    ids = [student['id'] for student in students]
+    for start in range(0, len(ids), STUDENT_PAGE):
+        page = ids[start:start + STUDENT_PAGE]
+        yield from db.execute_query(
+            STUDENT_ROWS_QUERY.format(ids=', '.join(['%s'] * len(page))), page, fetch_all=True
+        ) or []
+
+
+def _students(rows):
+    """Group consecutive rows of one student into a student dict"""
+    student = None
+    for row in rows:
+        if student is None or student['id'] != row['id']:
+            if student is not None:
+                yield student
+            student = {'id': row['id'], 'name': row['name'], 'email': row['email'],
+                       'department': row['department'], 'applications': 0, 'offers': []}
+        if row['status']:
+            student['applications'] += 1
+            if row['status'] == 'Selected':
+                student['offers'].append({'company_name': row['company_name'], 'job_role': row['job_role']})
+    if student is not None:
+        yield student
+
+
+def render_tasks(rows, certificates=True, summaries=True, issued_on=None):
+    """Worker tasks: certificate batches as students stream in, one summary per department"""
+    issued_on = issued_on or date.today().strftime('%d %B %Y')
+    batch, department_students, department = [], [], object()
+    for student in _students(rows):
+        if student['department'] != department:
+            if summaries and department_students:
+                yield ('summary', (department, department_students), issued_on)
+            department, department_students = student['department'], []
+        if summaries:
+            department_students.append(student)
+        if certificates and student['offers']:
+            batch.append(student)
+            if len(batch) == CERTIFICATE_BATCH:
+                yield ('certificates', batch, issued_on)
+                batch = []
+    if certificates and batch:
+        yield ('certificates', batch, issued_on)
+    if summaries and department_students:
+        yield ('summary', (department, department_students), issued_on)
+
+# ==================== Parallel rendering ====================
+
+def _new_pool(workers):
+    # spawn: forking a threaded gunicorn worker is not safe
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+def _get_pool():
+    """The process's shared render pool, started on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = _new_pool(PDF_WORKERS)
+        return _pool
+
+
+def _reset_pool(broken):
+    """Drop a pool whose worker died so the next export starts a fresh one"""
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            broken.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def render_documents(tasks, workers=None, stats=None, progress_every=None):
+    """
+    Render tasks in a process pool, yielding (name, pdf bytes, pages) as they finish
+
+    Args:
+        tasks: Iterable from render_tasks(); consumed lazily
+        workers: Process count for a dedicated pool (default: the shared
+            PDF_WORKERS pool, kept warm between exports)
+        stats: Optional dict updated with documents, pages, bytes, seconds, pages_per_second
+        progress_every: Seconds between progress lines (None: quiet)
+    """
+    pool = _new_pool(workers) if workers else _get_pool()
+    workers = workers or PDF_WORKERS
+    stats = stats if stats is not None else {}
+    stats.update(documents=0, pages=0, bytes=0, workers=workers)
+    start = last_report = time.monotonic()
+
+    def finished(futures):
+        nonlocal last_report
+        for future in futures:
+            for name, data, pages in future.result():
+                stats['documents'] += 1
+                stats['pages'] += pages
+                stats['bytes'] += len(data)
+                yield name, data, pages
+        now = time.monotonic()
+        if progress_every is not None and now - last_report >= progress_every:
+            last_report = now
+            print(f"  {stats['documents']} documents, {stats['pages'] / (now - start):.1f} pages/s")
+
+    pending = set()
+    try:
+        for task in tasks:
+            pending.add(pool.submit(_render_task, task))
+            if len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                yield from finished(done)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            yield from finished(done)
+    except BrokenProcessPool:
+        _reset_pool(pool)
+        raise
+    finally:
+        # Client disconnected or a render failed: drop queued work
+        for future in pending:
+            future.cancel()
+        if pool is not _pool:
+            pool.shutdown(wait=True, cancel_futures=True)
+        seconds = time.monotonic() - start
+        stats['seconds'] = round(seconds, 2)
+        stats['pages_per_second'] = round(stats['pages'] / seconds, 1) if seconds else 0
+
+# ==================== Zip streaming ====================
+
+class _ZipStream:
+    """Write-only, unseekable sink for zipfile; drain() hands out what was written"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def generate_zip(department=None, certificates=True, summaries=True, workers=None, rows=None):
+    """
+    Zip of rendered PDFs as a generator of bytes chunks (one per finished document)
+
+    The first next() only claims a PDF_MAX_JOBS slot and yields b'', so a
+    route can report PdfBusy before it starts streaming.
+
+    Args:
+        department: Only this department (None: every department)
+        certificates / summaries: Which documents to include
+        workers: Process count (default PDF_WORKERS)
+        rows: Student/application rows (default: streamed from the database)
+
+    Raises:
+        PdfBusy: PDF_MAX_JOBS exports are already running in this process
+    """
+    if not _jobs.acquire(blocking=False):
+        raise PdfBusy('A PDF export is already running, please try again shortly')
+    try:
+        yield b''
+        stats = {}
+        sink = _ZipStream()
+        # PDFs are already compressed
+        with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as archive:
+            tasks = render_tasks(rows if rows is not None else student_rows(department), certificates, summaries)
+            for name, data, _ in render_documents(tasks, workers, stats):
+                archive.writestr(name, data)
+                yield sink.drain()
+            archive.writestr('summary.json', json.dumps(
+                {'department': department, 'certificates': certificates, 'summaries': summaries, **stats},
+                indent=2))
+        yield sink.drain()
+        print(f"✓ Rendered {stats['documents']} PDF(s), {stats['pages']} pages in {stats['seconds']}s "
+              f"({stats['pages_per_second']} pages/s, {stats['workers']} workers)")
+    finally:
+        _jobs.release()
+
+# ==================== CLI ====================
+
+def synthetic_rows(count):
+    """Rows shaped like STUDENT_ROWS_QUERY for benchmarking without a database"""
+    departments = ['Computer Science', 'Electronics', 'Mechanical', 'Civil', 'Electrical']
+    companies = ['Acme Corp', 'Globex', 'Initech', 'Umbrella', 'Hooli']
+    for i in range(count):
+        department = departments[i * len(departments) // count]
+        for j in range(i % 4 + 1):
+            status = 'Selected' if (i + j) % 3 == 0 else 'Applied'
+            yield {'id': i, 'name': f'Student {i}', 'email': f'student{i}@college.edu', 'department': department,
+                   'company_name': companies[(i + j) % len(companies)], 'job_role': 'Software Engineer',
+                   'status': status, 'updated_at': None}
+
+
+def _option(args, flag, default=None, cast=str):
+    return cast(args[args.index(flag) + 1]) if flag in args else default
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    command = args[0] if args else None
+    workers = _option(args, '--workers', cast=int)
+    try:
+        if command == 'render':
+            out = _option(args, '--out', 'placement_pdfs.zip')
+            with open(out, 'wb') as f:
+                for chunk in generate_zip(_option(args, '--department'), workers=workers):
+                    f.write(chunk)
+            print(f"✓ Wrote {out}")
+        elif command == 'bench':
+            stats = {}
+            rows = synthetic_rows(_option(args, '--students', 2000, int))
+            for _ in render_documents(render_tasks(rows), workers, stats, progress_every=2.0):
+                pass
+            print(f"✓ {stats['documents']} documents, {stats['pages']} pages in {stats['seconds']}s "
+                  f"({stats['pages_per_second']} pages/s, {stats['workers']} workers)")
+        else:
+            print(__doc__)
+            sys.exit(2)
+    finally:
+        db.close()
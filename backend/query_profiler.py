@@ -0,0 +1,116 @@
+"""
+Per-request database query instrumentation
+
+Records query count, total DB time and the slowest statement for every
+Flask request, logs slow queries and requests that spend too long in the
+database (with their slowest statement), warns when the same query shape
+runs many times in one request (N+1) and adds a Server-Timing header.
+"""
+import os
+import re
+import time
+from collections import Counter
+from flask import g, has_request_context, request
+
+SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+REPEATED_QUERY_THRESHOLD = int(os.getenv('REPEATED_QUERY_THRESHOLD', 5))
+SLOW_REQUEST_DB_MS = float(os.getenv('SLOW_REQUEST_DB_MS', 500))  # total DB time per request
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*(?:\?|%s)\s*,?)+\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_query(query):
+    """Reduce a statement to its shape so repeated queries can be grouped"""
+    shape = _STRING_LITERAL.sub('?', query)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = _IN_LIST.sub('IN (...)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+class RequestQueryStats:
+    """Query counters for a single request"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest_query = None
+        self.slowest_time = 0.0
+        self.shapes = Counter()
+
+    def record(self, query, elapsed):
+        self.count += 1
+        self.total_time += elapsed
+        if elapsed > self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_query = query
+        self.shapes[normalize_query(query)] += 1
+
+    def repeated_shapes(self, threshold=REPEATED_QUERY_THRESHOLD):
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    def to_dict(self):
+        return {
+            'query_count': self.count,
+            'db_time_ms': round(self.total_time * 1000, 2),
+            'slowest_query': normalize_query(self.slowest_query) if self.slowest_query else None,
+            'slowest_ms': round(self.slowest_time * 1000, 2),
+        }
+
+
+def get_request_stats():
+    """Stats for the current request, or None outside a request"""
+    if not has_request_context():
+        return None
+    return g.get('query_stats')
+
+
+def record_query(query, elapsed):
+    """Database query listener"""
+    elapsed_ms = elapsed * 1000
+    if elapsed_ms >= SLOW_QUERY_MS:
+        where = request.path if has_request_context() else 'background'
+        print(f"🐢 Slow query ({elapsed_ms:.1f} ms) on {where}: {normalize_query(query)[:300]}")
+
+    stats = get_request_stats()
+    if stats is not None:
+        stats.record(query, elapsed)
+
+
+def _start_request():
+    g.query_stats = RequestQueryStats()
+    g.request_started = time.perf_counter()
+
+
+def _finish_request(response):
+    stats = get_request_stats()
+    if stats is None:
+        return response
+
+    for shape, n in stats.repeated_shapes():
+        print(f"⚠️ Possible N+1 on {request.path}: query ran {n} times: {shape[:300]}")
+
+    summary = stats.to_dict()
+    if summary['db_time_ms'] >= SLOW_REQUEST_DB_MS:
+        print(f"🐢 Slow request {request.method} {request.path}: {summary['query_count']} queries, "
+              f"{summary['db_time_ms']} ms in DB, slowest {summary['slowest_ms']} ms: "
+              f"{(summary['slowest_query'] or '')[:300]}")
+
+    total_ms = (time.perf_counter() - g.request_started) * 1000
+    response.headers.add(
+        'Server-Timing',
+        f'db;dur={summary["db_time_ms"]:.2f};desc="{summary["query_count"]} queries", '
+        f'db-slowest;dur={summary["slowest_ms"]:.2f}, app;dur={total_ms:.2f}'
+    )
+    return response
+
+
+def init_query_profiler(app, database):
+    """Attach the profiler to a Flask app and a Database instance"""
+    if os.getenv('QUERY_PROFILER', 'True').lower() != 'true':
+        return
+    database.query_listeners.append(record_query)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
@@ -0,0 +1,319 @@
+"""
+Cached report exports
+
+Each export (report, department, format, sheet) is generated once per data
+version and kept on disk in REPORT_CACHE_DIR. The data version is a digest of
+the newest updated_at/created_at of users, drives and applications and a
+deletion counter (index lookups, see migrations 010 and 013), so repeated
+downloads are served from the same file, unchanged, until one of those
+tables changes.
+Routes that delete report rows must call record_deletion() in their
+transaction.
+
+A scheduled background job (refresh_reports, every REPORT_REFRESH_INTERVAL
+seconds) regenerates only the exports that are stale and were downloaded in
+the last REPORT_CACHE_IDLE_DAYS, so the first download after a change is
+usually already built. A version whose newest change is younger than
+REPORT_SETTLE_SECONDS may not be fully visible yet (same-second updates,
+replica lag); such exports bypass the cache and are generated for the
+request by reports.export_response.
+
+Usage:
+    return export_response('tpo', None, 'xlsx')
+
+    python report_cache.py stats      # cached exports and the current data version
+    python report_cache.py refresh    # regenerate stale exports now
+    python report_cache.py clear      # delete every cached file
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+
+# Add backend directory to path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from flask import send_file
+
+from database import db
+import reports
+
+REPORT_CACHE = os.getenv('REPORT_CACHE', 'True').lower() == 'true'
+REPORT_CACHE_DIR = Path(os.getenv('REPORT_CACHE_DIR') or backend_dir / 'report_cache')
+REPORT_REFRESH_INTERVAL = int(os.getenv('REPORT_REFRESH_INTERVAL', 600))
+REPORT_CACHE_IDLE_DAYS = float(os.getenv('REPORT_CACHE_IDLE_DAYS', 7))
+REPORT_SETTLE_SECONDS = int(os.getenv('REPORT_SETTLE_SECONDS', 5))  # set >= DB_REPLICA_MAX_LAG with replicas
+
+# (report, department, format, sheet) kept warm even before anyone downloads them
+DEFAULT_EXPORTS = [('tpo', None, 'xlsx', None)]
+
+DATA_VERSION_QUERY = """
+    SELECT NOW() as now,
+           (SELECT MAX(updated_at) FROM applications) as applications_updated,
+           (SELECT MAX(created_at) FROM drives) as drives_created,
+           (SELECT MAX(updated_at) FROM drives) as drives_updated,
+           (SELECT MAX(updated_at) FROM users) as users_updated,
+           (SELECT deletions FROM report_data_version WHERE id = 1) as deletions
+"""
+
+CachedExport = namedtuple('CachedExport', 'file download_name mimetype version')
+
+_locks = {}
+_locks_guard = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'uncached': 0, 'refreshed': 0}
+_stats_lock = threading.Lock()
+
+
+def _report(name, department):
+    """(sheets, download basename) of a report"""
+    if name == 'tpo':
+        return reports.tpo_report(), 'placement_report'
+    if name == 'hod':
+        return reports.hod_report(department), f'{department}_report'
+    raise reports.ReportError(f"Unknown report '{name}'")
+
+
+def data_version():
+    """
+    Stamp of the data every report reads
+
+    Returns:
+        (version, settled): a short hex digest, and whether the newest change
+        is old enough for a report built now to be cached under it
+    """
+    row = db.execute_query(DATA_VERSION_QUERY, fetch_one=True)
+    now = row.pop('now')
+    raw = json.dumps(row, sort_keys=True, default=str)
+    newest = max((value for key, value in row.items() if key != 'deletions' and value), default=None)
+    settled = newest is None or (now - newest).total_seconds() >= REPORT_SETTLE_SECONDS
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16], settled
+
+
+def record_deletion():
+    """Deletes leave no updated_at behind; bump the counter in the data version"""
+    db.execute_query("UPDATE report_data_version SET deletions = deletions + 1 WHERE id = 1")
+
+
+def _count(key, amount=1):
+    # Request threads and the refresh job update the counters concurrently
+    with _stats_lock:
+        _stats[key] += amount
+
+
+def _variant(name, department, fmt, sheet):
+    variant = {'report': name, 'department': department, 'format': fmt, 'sheet': sheet}
+    digest = hashlib.sha256(json.dumps(variant, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    return digest, variant
+
+
+def _meta_path(digest):
+    return REPORT_CACHE_DIR / f'{digest}.json'
+
+
+def _artifact_path(digest, version):
+    return REPORT_CACHE_DIR / f'{digest}-{version}'
+
+
+def _lock(digest):
+    with _locks_guard:
+        return _locks.setdefault(digest, threading.Lock())
+
+
+def _prune_versions(digest, keep):
+    for path in REPORT_CACHE_DIR.glob(f'{digest}-*'):
+        if path.name != keep.name and not path.name.endswith('.tmp'):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _build(digest, variant, sheets, fmt, version):
+    """Write the export to <digest>-<version> (atomic rename) and drop older versions"""
+    REPORT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = _artifact_path(digest, version)
+    tmp_path = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    try:
+        with open(tmp_path, 'wb') as output:
+            reports.write_export(sheets, fmt, output)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    meta = _meta_path(digest)
+    if not meta.exists():
+        meta.write_text(json.dumps(variant))
+    _prune_versions(digest, path)
+    return path
+
+
+def get_export(name, department, fmt, sheet=None):
+    """
+    Export of a report, from the cache when the data has not changed
+
+    Args:
+        name: 'tpo' or 'hod'
+        department: Department of an HOD report (None for TPO)
+        fmt: xlsx, csv, parquet or arrow
+        sheet: Optional sheet title
+
+    Returns:
+        CachedExport with an open binary file positioned at the start, or
+        None if the data is too fresh to cache (or caching is off)
+
+    Raises:
+        reports.ReportError: Unknown report, format or sheet
+    """
+    sheets, basename = _report(name, department)
+    sheets, fmt = reports.select_export(sheets, fmt, sheet)
+    download_name, mimetype = reports.export_file_info(sheets, fmt, basename)
+    if sheet:
+        sheet = sheets[0].title
+    version, settled = data_version()
+    if not (REPORT_CACHE and settled):
+        return None
+
+    digest, variant = _variant(name, department, fmt, sheet)
+    path = _artifact_path(digest, version)
+    with _lock(digest):
+        if path.exists():
+            _count('hits')
+        else:
+            _count('misses')
+            _build(digest, variant, sheets, fmt, version)
+        try:
+            output = open(path, 'rb')
+        except FileNotFoundError:
+            # Another process built a newer version and pruned this one
+            return None
+    # Downloads keep the export in the refresh set
+    _meta_path(digest).touch()
+    return CachedExport(output, download_name, mimetype, version)
+
+
+def export_response(name, department, fmt, sheet=None):
+    """
+    Flask response with a report export: the cached file when the data has
+    not changed, otherwise generated for this request by reports.export_response
+
+    Raises:
+        reports.ReportError: Unknown report, format or sheet
+    """
+    export = get_export(name, department, fmt, sheet)
+    if export is None:
+        _count('uncached')
+        sheets, basename = _report(name, department)
+        return reports.export_response(sheets, fmt, basename, sheet=sheet)
+    return send_file(export.file, mimetype=export.mimetype, as_attachment=True,
+                     download_name=export.download_name, etag=export.version)
+
+
+def refresh_stale():
+    """
+    Rebuild cached exports whose data changed; forget exports not downloaded
+    for REPORT_CACHE_IDLE_DAYS
+
+    Returns:
+        Number of exports rebuilt
+    """
+    version, settled = data_version()
+    if not settled:
+        return 0
+    REPORT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+    variants = dict(_variant(*export) for export in DEFAULT_EXPORTS)
+    idle_before = time.time() - REPORT_CACHE_IDLE_DAYS * 86400
+    for tmp_path in REPORT_CACHE_DIR.glob('*.tmp'):
+        # Left behind by a process that died while writing
+        if tmp_path.stat().st_mtime < time.time() - 3600:
+            tmp_path.unlink(missing_ok=True)
+    for meta in REPORT_CACHE_DIR.glob('*.json'):
+        digest = meta.stem
+        if digest in variants:
+            continue
+        if meta.stat().st_mtime < idle_before:
+            for path in REPORT_CACHE_DIR.glob(f'{digest}-*'):
+                path.unlink(missing_ok=True)
+            meta.unlink(missing_ok=True)
+            continue
+        variants[digest] = json.loads(meta.read_text())
+
+    rebuilt = 0
+    for digest, variant in variants.items():
+        if _artifact_path(digest, version).exists():
+            continue
+        try:
+            sheets, _ = _report(variant['report'], variant['department'])
+            sheets, fmt = reports.select_export(sheets, variant['format'], variant['sheet'])
+            start = time.perf_counter()
+            with _lock(digest):
+                if not _artifact_path(digest, version).exists():
+                    _build(digest, variant, sheets, fmt, version)
+                    rebuilt += 1
+            print(f"✓ Rebuilt {variant['report']} report ({variant['department'] or 'all'}, "
+                  f"{fmt}, {variant['sheet'] or 'all sheets'}) in {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            print(f"❌ Could not rebuild report export {digest}: {e}")
+    _count('refreshed', rebuilt)
+    return rebuilt
+
+
+def schedule_refresh(delay=0):
+    """Queue the next refresh_reports job unless one is already waiting"""
+    from jobs import enqueue
+
+    pending = db.execute_query(
+        "SELECT id FROM jobs WHERE job_type = 'refresh_reports' AND status = 'queued' LIMIT 1",
+        fetch_one=True
+    )
+    if not pending:
+        enqueue('refresh_reports', {}, max_attempts=1, delay=delay)
+
+
+def clear():
+    """Delete every cached export; returns the number of files removed"""
+    removed = 0
+    for path in REPORT_CACHE_DIR.glob('*'):
+        path.unlink(missing_ok=True)
+        removed += 1
+    return removed
+
+
+def cache_stats():
+    """Cached files, their size, the current data version and hit counters"""
+    files = [p for p in REPORT_CACHE_DIR.glob('*-*') if not p.name.endswith('.tmp')] \
+        if REPORT_CACHE_DIR.exists() else []
+    version, settled = data_version()
+    with _stats_lock:
+        counters = dict(_stats)
+    return {
+        'enabled': REPORT_CACHE,
+        'data_version': version,
+        'settled': settled,
+        'exports': len(files),
+        'current': sum(1 for p in files if p.name.endswith(f'-{version}')),
+        'bytes': sum(p.stat().st_size for p in files),
+        'refresh_interval': REPORT_REFRESH_INTERVAL,
+        **counters,
+    }
+
+
+if __name__ == '__main__':
+    command = sys.argv[1] if len(sys.argv) > 1 else 'stats'
+    try:
+        if command == 'stats':
+            print(json.dumps(cache_stats(), indent=2))
+        elif command == 'refresh':
+            print(f"✓ Rebuilt {refresh_stale()} report export(s)")
+        elif command == 'clear':
+            print(f"✓ Removed {clear()} cached file(s)")
+        else:
+            print(__doc__)
+            sys.exit(2)
+    finally:
+        db.close()
@@ -0,0 +1,369 @@
+"""
+Placement report exports
+
+A report is a list of sheets whose rows are generated from db.stream(), so
+only one batch of rows is in memory at a time. Every sheet can be written as:
+
+    xlsx     openpyxl write-only workbook (all sheets in one file)
+    csv      UTF-8, written in chunks of rows
+    parquet  columnar, written in row groups with pyarrow
+    arrow    Arrow IPC file, written in record batches with pyarrow
+
+Files are spooled to a temporary file at database speed and then streamed
+to the client, so a slow download never holds a server-side cursor open
+(MySQL aborts it after net_write_timeout, truncating the file). A
+multi-sheet report in csv/parquet/arrow is a zip with one file per sheet;
+pass sheet=<title> to get a single table. Columns are identical in every
+format. write_export() writes the same files to disk for report_cache.
+
+Usage:
+    return export_response(tpo_report(), 'csv', 'placement_report')
+"""
+import csv
+import io
+import os
+import re
+import tempfile
+import zipfile
+from collections import namedtuple
+
+import openpyxl
+from flask import send_file
+
+from database import db
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:  # columnar formats are optional
+    pa = None
+
+# Where export files are spooled (defaults to the system temp directory)
+EXPORT_TMP_DIR = os.getenv('EXPORT_TMP_DIR') or None
+
+# Rows per Parquet row group / Arrow record batch
+COLUMNAR_BATCH_ROWS = 10000
+
+EXPORT_FORMATS = {
+    'xlsx': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'csv': ('.csv', 'text/csv'),
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('.arrow', 'application/vnd.apache.arrow.file'),
+}
+XLSX_MIMETYPE = EXPORT_FORMATS['xlsx'][1]
+
+# types: one of 'string', 'int', 'date', 'timestamp' per column (default: all 'string')
+Sheet = namedtuple('Sheet', 'title headers rows types', defaults=(None,))
+
+
+class ReportError(ValueError):
+    """Unknown format or sheet, or a format whose library is not installed"""
+
+
+def stream_rows(query, params=None, convert=None):
+    """Rows of a query, fetched in batches, optionally mapped by convert(row)"""
+    for batch in db.stream(query, params):
+        for row in batch:
+            yield convert(row) if convert else row
+
+# ==================== Report definitions ====================
+
+STUDENT_TYPES = ['string', 'string', 'string', 'string', 'int', 'int']
+APPLICATION_HEADERS = ['Student', 'Email', 'Department', 'Company', 'Job Role', 'Status', 'Applied At', 'Updated At']
+APPLICATION_TYPES = ['string'] * 6 + ['timestamp', 'timestamp']
+
+
+def _student_row(student):
+    return [
+        student['name'],
+        student['email'],
+        student.get('department') or '',
+        'Yes' if student['is_approved'] else 'No',
+        student['total_applications'] or 0,
+        student['selected_count'] or 0
+    ]
+
+
+def _application_row(application):
+    return [
+        application['student_name'],
+        application['email'],
+        application.get('department') or '',
+        application['company_name'],
+        application['job_role'],
+        application['status'],
+        application['applied_at'],
+        application['updated_at']
+    ]
+
+
+def _applications_sheet(department=None):
+    where = "WHERE u.department = %s" if department is not None else ""
+    return Sheet(
+        'Applications',
+        APPLICATION_HEADERS,
+        stream_rows(
+            f"""SELECT u.name as student_name, u.email, u.department, d.company_name, d.job_role,
+                       a.status, a.applied_at, a.updated_at
+                FROM applications a
+                JOIN users u ON a.student_id = u.id
+                JOIN drives d ON a.drive_id = d.id
+                {where}
+                ORDER BY a.applied_at DESC, a.id DESC""",
+            (department,) if department is not None else None,
+            convert=_application_row
+        ),
+        APPLICATION_TYPES
+    )
+
+
+def tpo_report():
+    """Sheets of the TPO placement report"""
+    students = stream_rows(
+        """SELECT u.name, u.email, u.department, u.is_approved,
+                  COUNT(DISTINCT a.id) as total_applications,
+                  COUNT(DISTINCT CASE WHEN a.status = 'Selected' THEN a.id END) as selected_count
+           FROM users u
+           LEFT JOIN applications a ON u.id = a.student_id
+           WHERE u.role = 'student'
+           GROUP BY u.id, u.name, u.email, u.department, u.is_approved""",
+        convert=_student_row
+    )
+    drives = stream_rows(
+        "SELECT company_name, job_role, eligibility, last_date, status FROM drives ORDER BY created_at DESC",
+        convert=lambda drive: [
+            drive['company_name'],
+            drive['job_role'],
+            drive.get('eligibility') or '',
+            drive['last_date'],
+            drive['status']
+        ]
+    )
+    return [
+        Sheet('Students', ['Name', 'Email', 'Department', 'Approved', 'Total Applications', 'Selected'],
+              students, STUDENT_TYPES),
+        Sheet('Drives', ['Company', 'Job Role', 'Eligibility', 'Last Date', 'Status'],
+              drives, ['string', 'string', 'string', 'date', 'string']),
+        _applications_sheet(),
+    ]
+
+
+def hod_report(department):
+    """Sheets of a department's report"""
+    students = stream_rows(
+        """SELECT u.name, u.email, u.is_approved,
+                  COUNT(DISTINCT a.id) as total_applications,
+                  COUNT(DISTINCT CASE WHEN a.status = 'Selected' THEN a.id END) as selected_count
+           FROM users u
+           LEFT JOIN applications a ON u.id = a.student_id
+           WHERE u.role = 'student' AND u.department = %s
+           GROUP BY u.id, u.name, u.email, u.is_approved""",
+        (department,),
+        convert=lambda student: [
+            student['name'],
+            student['email'],
+            'Yes' if student['is_approved'] else 'No',
+            student['total_applications'] or 0,
+            student['selected_count'] or 0
+        ]
+    )
+    return [
+        Sheet('Department Report', ['Name', 'Email', 'Approved', 'Total Applications', 'Selected'],
+              students, ['string', 'string', 'string', 'int', 'int']),
+        _applications_sheet(department),
+    ]
+
+# ==================== Writers ====================
+
+def spool_file(suffix):
+    """Anonymous temporary file, deleted when closed"""
+    return tempfile.TemporaryFile(suffix=suffix, dir=EXPORT_TMP_DIR)
+
+
+def sheet_filename(sheet, fmt):
+    return re.sub(r'[^a-z0-9]+', '_', sheet.title.lower()).strip('_') + EXPORT_FORMATS[fmt][0]
+
+
+def write_xlsx(sheets, output=None):
+    """
+    Write sheets to a write-only workbook
+
+    Args:
+        sheets: list of Sheet; rows are consumed lazily, one sheet at a time
+        output: Writable binary file (default: a new temporary file)
+
+    Returns:
+        The output file, rewound to the start
+    """
+    output = output or spool_file('.xlsx')
+    wb = openpyxl.Workbook(write_only=True)
+    for sheet in sheets:
+        ws = wb.create_sheet(sheet.title)
+        ws.append(sheet.headers)
+        for row in sheet.rows:
+            ws.append(row)
+    wb.save(output)
+    output.seek(0)
+    return output
+
+
+def iter_csv(sheet, rows_per_chunk=1000):
+    """CSV text of a sheet in chunks of rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(sheet.headers)
+    for count, row in enumerate(sheet.rows, 1):
+        writer.writerow(row)
+        if count % rows_per_chunk == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _arrow_schema(sheet):
+    arrow_types = {
+        'string': pa.string(),
+        'int': pa.int64(),
+        'date': pa.date32(),
+        'timestamp': pa.timestamp('s'),
+    }
+    types = sheet.types or ['string'] * len(sheet.headers)
+    return pa.schema([(header, arrow_types[t]) for header, t in zip(sheet.headers, types)])
+
+
+def _record_batches(sheet, schema):
+    """Sheet rows as Arrow record batches of COLUMNAR_BATCH_ROWS rows"""
+    rows = []
+
+    def to_batch():
+        columns = list(zip(*rows))
+        return pa.record_batch(
+            [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+            schema=schema
+        )
+
+    for row in sheet.rows:
+        rows.append(row)
+        if len(rows) >= COLUMNAR_BATCH_ROWS:
+            yield to_batch()
+            rows = []
+    if rows:
+        yield to_batch()
+
+
+def write_columnar(sheet, fmt, output):
+    """Write one sheet as Parquet or an Arrow IPC file, one batch at a time"""
+    if pa is None:
+        raise ReportError(f"{fmt} export needs pyarrow, which is not installed")
+    schema = _arrow_schema(sheet)
+    if fmt == 'parquet':
+        with pq.ParquetWriter(output, schema, compression='snappy') as writer:
+            for batch in _record_batches(sheet, schema):
+                writer.write_batch(batch)
+    else:
+        with pa_ipc.new_file(output, schema) as writer:
+            for batch in _record_batches(sheet, schema):
+                writer.write_batch(batch)
+    return output
+
+
+def write_csv(sheet, output):
+    """Write one sheet as UTF-8 CSV to a binary file"""
+    text = io.TextIOWrapper(output, encoding='utf-8', newline='')
+    for chunk in iter_csv(sheet):
+        text.write(chunk)
+    text.flush()
+    text.detach()
+    return output
+
+
+def write_zip(sheets, fmt, output=None):
+    """One csv/parquet/arrow file per sheet in a zip; returns the rewound output"""
+    output = output or spool_file('.zip')
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for sheet in sheets:
+            with archive.open(sheet_filename(sheet, fmt), 'w', force_zip64=True) as member:
+                if fmt == 'csv':
+                    write_csv(sheet, member)
+                else:
+                    # pyarrow needs a seekable sink for some writers; spool, then copy
+                    with spool_file(EXPORT_FORMATS[fmt][0]) as spooled:
+                        write_columnar(sheet, fmt, spooled)
+                        spooled.seek(0)
+                        for chunk in iter(lambda: spooled.read(1024 * 1024), b''):
+                            member.write(chunk)
+    output.seek(0)
+    return output
+
+
+def select_export(sheets, fmt, sheet=None):
+    """
+    Validate an export request
+
+    Args:
+        sheets: The report's sheets
+        fmt: xlsx, csv, parquet or arrow (default xlsx)
+        sheet: Optional sheet title to export only that table
+
+    Returns:
+        (sheets to export, normalized format)
+
+    Raises:
+        ReportError: Unknown format or sheet, or pyarrow missing
+    """
+    fmt = (fmt or 'xlsx').lower()
+    if fmt not in EXPORT_FORMATS:
+        raise ReportError(f"Unknown format '{fmt}' (use {', '.join(EXPORT_FORMATS)})")
+    if fmt in ('parquet', 'arrow') and pa is None:
+        raise ReportError(f"{fmt} export needs pyarrow, which is not installed")
+    if sheet:
+        sheets = [s for s in sheets if s.title.lower() == sheet.lower()]
+        if not sheets:
+            raise ReportError(f"Unknown sheet '{sheet}'")
+    return sheets, fmt
+
+
+def export_file_info(sheets, fmt, basename):
+    """(download name, mimetype) of an export of the selected sheets"""
+    suffix, mimetype = EXPORT_FORMATS[fmt]
+    if fmt == 'xlsx':
+        return f'{basename}{suffix}', mimetype
+    if len(sheets) > 1:
+        return f'{basename}_{fmt}.zip', 'application/zip'
+    return f"{basename}_{sheet_filename(sheets[0], fmt)}", mimetype
+
+
+def write_export(sheets, fmt, output):
+    """Write the selected sheets in the given format to a binary file"""
+    if fmt == 'xlsx':
+        write_xlsx(sheets, output)
+    elif len(sheets) > 1:
+        write_zip(sheets, fmt, output)
+    elif fmt == 'csv':
+        write_csv(sheets[0], output)
+    else:
+        write_columnar(sheets[0], fmt, output)
+    return output
+
+
+def export_response(sheets, fmt, basename, sheet=None):
+    """
+    Flask response with a report in the given format
+
+    Args:
+        sheets: The report's sheets
+        fmt: xlsx, csv, parquet or arrow
+        basename: Download name without extension
+        sheet: Optional sheet title to export only that table
+
+    Raises:
+        ReportError: Unknown format or sheet, or pyarrow missing
+    """
+    sheets, fmt = select_export(sheets, fmt, sheet)
+    download_name, mimetype = export_file_info(sheets, fmt, basename)
+    # Drain the cursors into a file first; the client then reads at its own pace
+    output = write_export(sheets, fmt, spool_file(os.path.splitext(download_name)[1]))
+    output.seek(0)
+    return send_file(output, mimetype=mimetype, as_attachment=True, download_name=download_name)
@@ -0,0 +1,268 @@
+"""
+Resume text extraction
+
+PyPDF2/python-docx parsing is CPU-bound, so requests and jobs extract in a
+bounded process pool (extract_document_isolated) with a per-file timeout
+and a cap on how much memory a parse may allocate. reextract_files() parses many
+files in parallel across all cores, e.g. after an extractor upgrade.
+"""
+import hashlib
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import PyPDF2
+from docx import Document
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Bump when extraction output changes so cached texts can be re-extracted
+EXTRACTOR_VERSION = 2
+
+# Resumes are a few pages; anything longer is not worth parsing in full
+MAX_PAGES = int(os.getenv('RESUME_MAX_PAGES', 20))
+
+EXTRACT_WORKERS = int(os.getenv('EXTRACT_WORKERS', 2))
+EXTRACT_TIMEOUT = int(os.getenv('EXTRACT_TIMEOUT', 20))  # seconds per file
+EXTRACT_MEMORY_MB = int(os.getenv('EXTRACT_MEMORY_MB', 512))  # per parse, 0 disables
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def file_hash(file_path, chunk_size=65536):
+    """SHA-256 of a file's contents, used as the key of its extracted text"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def extract_document(file_path, max_pages=MAX_PAGES):
+    """
+    Extract text from a PDF or DOCX file
+
+    Returns:
+        (text, page_count); text is '' if the file could not be parsed
+    """
+    try:
+        if file_path.endswith('.pdf'):
+            with open(file_path, 'rb') as f:
+                pdf_reader = PyPDF2.PdfReader(f)
+                pages = pdf_reader.pages[:max_pages]
+                # Collect pages and join once instead of repeated concatenation
+                return '\n'.join(page.extract_text() or '' for page in pages).strip(), len(pages)
+        elif file_path.endswith('.docx') or file_path.endswith('.doc'):
+            doc = Document(file_path)
+            return '\n'.join(para.text for para in doc.paragraphs).strip(), 1
+    except (TimeoutError, MemoryError):
+        # Limits enforced by the process pool; let _extract_job report them
+        raise
+    except Exception as e:
+        print(f"Error extracting text: {e}")
+    return '', 0
+
+def extract_text_from_file(file_path):
+    """Extract text from PDF or DOCX file"""
+    return extract_document(file_path)[0]
+
+# ==================== Process pool ====================
+
+def _address_space():
+    """Virtual memory size of this process in bytes, or None where /proc is missing"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+def _init_worker(memory_mb):
+    """
+    Cap what a parse can allocate so a malformed PDF can't exhaust the host
+
+    The limit is memory_mb on top of the worker's size after start-up: a
+    spawned worker has re-imported the parent's __main__ (with `python app.py`
+    that is app.py, numpy, pyarrow, grpc...), which alone can map more than
+    the cap.
+    """
+    if resource is None or not memory_mb:
+        return
+    baseline = _address_space()
+    if baseline is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = baseline + memory_mb * 1024 * 1024
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+def _on_alarm(signum, frame):
+    raise TimeoutError
+
+def _extract_job(file_path, timeout, with_hash=False):
+    """
+    Runs inside a worker process
+
+    Returns:
+        (file_path, content_hash or None, text, page_count, error or None)
+    """
+    content_hash = None
+    if hasattr(signal, 'SIGALRM'):
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.alarm(timeout)
+    try:
+        if with_hash:
+            content_hash = file_hash(file_path)
+        text, page_count = extract_document(file_path)
+        return file_path, content_hash, text, page_count, None
+    except TimeoutError:
+        return file_path, content_hash, '', 0, f'timed out after {timeout}s'
+    except MemoryError:
+        return file_path, content_hash, '', 0, f'used more than {EXTRACT_MEMORY_MB} MB'
+    finally:
+        if hasattr(signal, 'SIGALRM'):
+            signal.alarm(0)
+
+def _new_pool(workers):
+    # spawn: forking a threaded gunicorn worker is not safe
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(EXTRACT_MEMORY_MB,)
+    )
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = _new_pool(EXTRACT_WORKERS)
+        return _pool
+
+def _reset_pool(broken):
+    """Replace a pool whose workers are stuck or dead"""
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            # A worker ignoring SIGALRM (stuck in C code) can only be killed
+            for process in list(getattr(broken, '_processes', {}).values()):
+                process.terminate()
+            broken.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def extract_document_isolated(file_path, timeout=EXTRACT_TIMEOUT):
+    """
+    extract_document() in the shared process pool
+
+    Returns:
+        (text, page_count); ('', 0) on timeout, memory limit or crash
+    """
+    pool = _get_pool()
+    try:
+        future = pool.submit(_extract_job, file_path, timeout)
+        # The worker enforces the timeout itself; the grace period covers a stuck worker
+        _, _, text, page_count, error = future.result(timeout=timeout + 5)
+    except (FutureTimeoutError, BrokenProcessPool, RuntimeError) as e:
+        # RuntimeError: the pool was shut down by another thread's reset
+        _reset_pool(pool)
+        error = f'worker failed: {type(e).__name__}'
+        text, page_count = '', 0
+    if error:
+        print(f"Error extracting text from {os.path.basename(file_path)}: {error}")
+    return text, page_count
+
+def _extract_batch(file_paths, workers, timeout, record):
+    """
+    Extract files in a fresh pool, calling record(*result) for each
+
+    Returns:
+        Files without a result, in submission order, if a worker crashed
+        (segfault, memory limit) and broke the pool; otherwise []
+    """
+    with _new_pool(workers) as pool:
+        futures = {pool.submit(_extract_job, path, timeout, True): path for path in file_paths}
+        recorded = set()
+        try:
+            for future in as_completed(futures):
+                result = future.result()
+                recorded.add(future)
+                record(*result)
+        except BrokenProcessPool as e:
+            print(f"✗ worker crashed, retrying unfinished files: {e}")
+            unfinished = []
+            for future, path in futures.items():
+                if future in recorded:
+                    continue
+                if future.done() and future.exception() is None:
+                    record(*future.result())
+                else:
+                    unfinished.append(path)
+            return unfinished
+    return []
+
+def reextract_files(file_paths, workers=None, timeout=EXTRACT_TIMEOUT, on_result=None, progress_every=2.0):
+    """
+    Extract many files in parallel across all cores
+
+    Args:
+        file_paths: Files to parse
+        workers: Process count (defaults to the number of CPUs)
+        timeout: Per-file timeout in seconds
+        on_result: callback(file_path, content_hash, text, page_count) for each parsed file
+        progress_every: Seconds between progress lines
+
+    Returns:
+        dict with files, extracted, failed, pages, seconds, files_per_second, pages_per_second
+    """
+    file_paths = list(file_paths)
+    workers = workers or os.cpu_count() or 1
+    start = last_report = time.monotonic()
+    done = extracted = failed = pages = 0
+
+    def record(path, content_hash, text, page_count, error):
+        nonlocal done, extracted, failed, pages, last_report
+        done += 1
+        if error or not text:
+            failed += 1
+            print(f"✗ {os.path.basename(path)}: {error or 'no text'}")
+        else:
+            extracted += 1
+            pages += page_count
+            if on_result:
+                on_result(path, content_hash, text, page_count)
+
+        now = time.monotonic()
+        if now - last_report >= progress_every or done == len(file_paths):
+            last_report = now
+            elapsed = max(now - start, 1e-6)
+            print(f"  {done}/{len(file_paths)} files, {done / elapsed:.1f} files/s, {pages / elapsed:.1f} pages/s")
+
+    remaining = file_paths
+    while remaining:
+        unfinished = _extract_batch(remaining, workers, timeout, record)
+        if not unfinished:
+            break
+        # Only the first workers + 1 unfinished files can have reached a worker
+        # (the executor's call queue); the rest were never tried
+        suspects, remaining = unfinished[:workers + 1], unfinished[workers + 1:]
+        for path in suspects:
+            # One at a time, so a crash is pinned on the file that caused it
+            if _extract_batch([path], 1, timeout, record):
+                record(path, None, '', 0, 'worker crashed')
+
+    seconds = time.monotonic() - start
+    return {
+        'files': len(file_paths),
+        'extracted': extracted,
+        'failed': failed,
+        'pages': pages,
+        'seconds': round(seconds, 2),
+        'files_per_second': round(len(file_paths) / seconds, 2) if seconds else 0,
+        'pages_per_second': round(pages / seconds, 2) if seconds else 0,
+    }
@@ -0,0 +1,108 @@
+"""
+Extracted resume text cache
+
+Text is extracted once per distinct file and stored in resume_texts keyed
+by the file's SHA-256, so later analyses never reparse the PDF/DOCX.
+
+Usage:
+    python resume_texts.py reextract [directory] [--workers N]
+        Re-extract every resume file (default: frontend/static/uploads/resumes)
+        in parallel, e.g. after bumping EXTRACTOR_VERSION
+"""
+import sys
+from pathlib import Path
+
+# Add backend directory to path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from database import db
+from resume_parser import EXTRACTOR_VERSION, extract_document_isolated, file_hash, reextract_files
+
+RESUMES_DIR = Path(__file__).parent.parent / 'frontend' / 'static' / 'uploads' / 'resumes'
+RESUME_EXTENSIONS = {'.pdf', '.docx', '.doc'}
+
+
+def load_text(content_hash):
+    """Cached text for a content hash, or None"""
+    row = db.execute_query(
+        "SELECT text FROM resume_texts WHERE content_hash = %s AND extractor_version >= %s",
+        (content_hash, EXTRACTOR_VERSION),
+        fetch_one=True
+    )
+    return row['text'] if row else None
+
+
+def save_text(content_hash, text, page_count):
+    db.execute_query(
+        """INSERT INTO resume_texts (content_hash, text, page_count, extractor_version)
+           VALUES (%s, %s, %s, %s)
+           ON DUPLICATE KEY UPDATE text = VALUES(text), page_count = VALUES(page_count),
+                                   extractor_version = VALUES(extractor_version), extracted_at = NOW()""",
+        (content_hash, text, page_count, EXTRACTOR_VERSION)
+    )
+
+
+def ensure_text(content_hash, file_path):
+    """Return the text for a file, extracting and storing it only on a cache miss"""
+    text = load_text(content_hash)
+    if text is not None:
+        return text
+    text, page_count = extract_document_isolated(file_path)
+    if text:
+        save_text(content_hash, text, page_count)
+    return text
+
+
+def ensure_content_hash(resume):
+    """
+    Content hash of a resumes row (needs id, file_path, content_hash)
+
+    Rows uploaded before the cache existed get hashed and backfilled here.
+    """
+    if not resume.get('content_hash'):
+        resume['content_hash'] = file_hash(resume['file_path'])
+        db.execute_query(
+            "UPDATE resumes SET content_hash = %s WHERE id = %s",
+            (resume['content_hash'], resume['id'])
+        )
+    return resume['content_hash']
+
+
+def get_resume_text(resume):
+    """Text for a resumes row, extracted at most once per distinct file"""
+    return ensure_text(ensure_content_hash(resume), resume['file_path'])
+
+
+def reextract_directory(directory=RESUMES_DIR, workers=None):
+    """Re-extract every resume file under directory and refresh resume_texts"""
+    paths = [str(p) for p in Path(directory).rglob('*') if p.suffix.lower() in RESUME_EXTENSIONS]
+    print(f"Re-extracting {len(paths)} resume file(s) from {directory}...")
+
+    def store(path, content_hash, text, page_count):
+        save_text(content_hash, text, page_count)
+        db.execute_query(
+            "UPDATE resumes SET content_hash = %s WHERE file_path = %s AND content_hash IS NULL",
+            (content_hash, path)
+        )
+
+    summary = reextract_files(paths, workers=workers, on_result=store)
+    print(f"✓ {summary['extracted']} extracted, {summary['failed']} failed in {summary['seconds']}s "
+          f"({summary['files_per_second']} files/s, {summary['pages_per_second']} pages/s)")
+    return summary
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if args and args[0] == 'reextract':
+        workers = None
+        if '--workers' in args:
+            index = args.index('--workers')
+            workers = int(args[index + 1])
+            del args[index:index + 2]
+        try:
+            reextract_directory(args[1] if len(args) > 1 else RESUMES_DIR, workers=workers)
+        finally:
+            db.close()
+    else:
+        print(__doc__)
@@ -0,0 +1,350 @@
+"""
+Resume search
+
+An inverted index over each student's latest resume, kept in
+search_postings: one row per (term, field, student) with the term frequency
+and, for resume words, the token positions used by phrase queries. The
+index is updated incrementally when a resume analysis finishes (and a
+student is dropped from it when they upload a new resume or its analysis
+fails), so a search only reads the postings of the query terms instead of
+every resume.
+
+Query syntax (case-insensitive):
+    docker react                 both words (AND is implicit)
+    docker OR kubernetes         either word
+    python -django  /  NOT django
+    "machine learning"           exact phrase in the resume text
+    skill:docker skill:"node.js" canonical skill (aliases resolve: skill:k8s)
+
+Usage:
+    python search_index.py rebuild     # index every student's latest resume
+"""
+import json
+import math
+import re
+import sys
+from pathlib import Path
+
+# Add backend directory to path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from database import db
+from skills import extract_skills, get_matcher, tokenize
+
+MAX_TERM_LENGTH = 64
+MAX_QUERY_CLAUSES = 20
+
+# Postings are inserted in batches of this many rows
+INSERT_BATCH = 1000
+
+QUERY_TOKEN = re.compile(r'(-)?(?:(skill):)?(?:"([^"]*)"|(\S+))', re.IGNORECASE)
+
+
+class QueryError(ValueError):
+    """The search query could not be parsed"""
+
+# ==================== Indexing ====================
+
+def skill_term(name):
+    return ' '.join(name.lower().split())[:MAX_TERM_LENGTH]
+
+
+def build_postings(text, skills):
+    """
+    Postings of one document
+
+    Returns:
+        (list of (term, field, tf, positions), token count)
+    """
+    positions = {}
+    tokens = tokenize(text)
+    for position, token in enumerate(tokens):
+        if len(token) <= MAX_TERM_LENGTH:
+            positions.setdefault(token, []).append(position)
+
+    postings = [
+        (term, 'text', min(len(found), 65535), ','.join(map(str, found)))
+        for term, found in positions.items()
+    ]
+
+    skill_counts = {}
+    for name, count in get_matcher().counts(text).items():
+        skill_counts[skill_term(name)] = count
+    for name in skills:
+        skill_counts.setdefault(skill_term(name), 1)
+    for term, count in skill_counts.items():
+        if term:
+            postings.append((term, 'skill', min(count, 65535), None))
+
+    return postings, len(tokens)
+
+
+def analysis_skills(feedback):
+    """Canonical skill names from an analysis dict (or its JSON)"""
+    if isinstance(feedback, str):
+        try:
+            feedback = json.loads(feedback)
+        except ValueError:
+            return []
+    skills = (feedback or {}).get('skills') or []
+    if isinstance(skills, str):
+        skills = skills.split(',')
+    # Gemini writes free-form names; map them to the taxonomy where possible
+    return extract_skills(', '.join(str(s) for s in skills)) or [s.strip() for s in skills if str(s).strip()]
+
+
+def _is_latest(user_id, resume_id):
+    latest = db.execute_query(
+        "SELECT MAX(id) as id FROM resumes WHERE user_id = %s", (user_id,), fetch_one=True
+    )
+    return bool(latest) and latest['id'] == resume_id
+
+
+def index_resume(user_id, resume_id, content_hash, text, feedback=None):
+    """Replace a student's document in the index with this resume (unless a newer one exists)"""
+    if not _is_latest(user_id, resume_id):
+        return 0
+    postings, token_count = build_postings(text or '', analysis_skills(feedback))
+    rows = [(term, field, user_id, tf, positions) for term, field, tf, positions in postings]
+
+    with db.transaction():
+        db.execute_query("DELETE FROM search_postings WHERE user_id = %s", (user_id,))
+        for start in range(0, len(rows), INSERT_BATCH):
+            db.executemany(
+                """INSERT INTO search_postings (term, field, user_id, tf, positions)
+                   VALUES (%s, %s, %s, %s, %s)""",
+                rows[start:start + INSERT_BATCH]
+            )
+        db.execute_query(
+            """INSERT INTO search_documents (user_id, resume_id, content_hash, token_count)
+               VALUES (%s, %s, %s, %s)
+               ON DUPLICATE KEY UPDATE resume_id = VALUES(resume_id), content_hash = VALUES(content_hash),
+                                       token_count = VALUES(token_count)""",
+            (user_id, resume_id, content_hash, token_count)
+        )
+    return len(rows)
+
+
+def unindex_resume(user_id, resume_id):
+    """
+    Drop a student from the index while their latest resume has no analysis
+    (just uploaded, or the analysis failed), so an older resume's terms don't
+    stay searchable
+    """
+    if not _is_latest(user_id, resume_id):
+        return
+    db.execute_query("DELETE FROM search_postings WHERE user_id = %s", (user_id,))
+    db.execute_query("DELETE FROM search_documents WHERE user_id = %s", (user_id,))
+
+
+def rebuild_index():
+    """Index the latest resume of every student that has extracted text"""
+    latest = db.execute_query(
+        """SELECT r.id, r.user_id, r.content_hash, r.feedback, rt.text
+           FROM resumes r
+           JOIN resume_texts rt ON rt.content_hash = r.content_hash
+           WHERE r.id IN (SELECT MAX(id) FROM resumes GROUP BY user_id)""",
+        fetch_all=True
+    ) or []
+    for resume in latest:
+        index_resume(resume['user_id'], resume['id'], resume['content_hash'], resume['text'], resume['feedback'])
+    return len(latest)
+
+# ==================== Queries ====================
+
+def parse_query(query):
+    """
+    Parse a query into OR-groups of AND-ed clauses
+
+    Returns:
+        list of groups; each group is a list of (field, terms, negated) where
+        terms has more than one entry for a phrase
+    """
+    groups = [[]]
+    negate_next = False
+    clauses = 0
+    for match in QUERY_TOKEN.finditer(query or ''):
+        minus, field, phrase, word = match.groups()
+        if phrase is None:
+            upper = word.upper()
+            if upper == 'OR' and not field:
+                if groups[-1]:
+                    groups.append([])
+                continue
+            if upper == 'AND' and not field:
+                continue
+            if upper == 'NOT' and not field:
+                negate_next = True
+                continue
+
+        if field:
+            name = phrase if phrase is not None else word
+            canonical = get_matcher().extract(name, limit=1)
+            terms = [skill_term(canonical[0] if canonical else name)]
+            field = 'skill'
+        else:
+            terms = [t[:MAX_TERM_LENGTH] for t in tokenize(phrase if phrase is not None else word)]
+            field = 'text'
+
+        negated = bool(minus) or negate_next
+        negate_next = False
+        if not terms or not terms[0]:
+            continue
+        clauses += 1
+        if clauses > MAX_QUERY_CLAUSES:
+            raise QueryError(f'At most {MAX_QUERY_CLAUSES} terms per query')
+        groups[-1].append((field, terms, negated))
+
+    groups = [group for group in groups if group]
+    if not groups:
+        raise QueryError('Empty query')
+    for group in groups:
+        if all(negated for _, _, negated in group):
+            raise QueryError('Each OR group needs at least one term that is not negated')
+    return groups
+
+
+def _filter_sql(department, approved):
+    conditions = ["u.role = 'student'"]
+    params = []
+    if department:
+        conditions.append("u.department = %s")
+        params.append(department)
+    if approved is not None:
+        conditions.append("u.is_approved = %s")
+        params.append(bool(approved))
+    return ' AND '.join(conditions), params
+
+
+def _postings(term, field, filters, filter_params, with_positions=False):
+    """user_id -> tf (or positions list) for one term, restricted to the filtered students"""
+    columns = "p.user_id, p.tf" + (", p.positions" if with_positions else "")
+    rows = db.execute_query(
+        f"""SELECT {columns}
+            FROM search_postings p
+            JOIN users u ON u.id = p.user_id
+            WHERE p.term = %s AND p.field = %s AND {filters}""",
+        (term, field, *filter_params),
+        fetch_all=True
+    ) or []
+    if with_positions:
+        return {row['user_id']: [int(p) for p in row['positions'].split(',')] for row in rows if row['positions']}
+    return {row['user_id']: row['tf'] for row in rows}
+
+
+def _phrase_matches(term_positions, user_id):
+    """True if the phrase's terms occur at consecutive positions"""
+    first, *rest = term_positions
+    later = [set(positions[user_id]) for positions in rest]
+    return any(
+        all(start + offset in positions for offset, positions in enumerate(later, 1))
+        for start in first[user_id]
+    )
+
+
+def _clause(field, terms, filters, filter_params, total_docs, cache):
+    """user_id -> score for one clause"""
+    key = (field, tuple(terms))
+    if key in cache:
+        return cache[key]
+
+    if len(terms) == 1:
+        postings = _postings(terms[0], field, filters, filter_params)
+        idf = math.log1p(total_docs / (len(postings) or 1))
+        scores = {user_id: (1 + math.log(tf)) * idf for user_id, tf in postings.items()}
+    else:
+        term_positions = [_postings(term, field, filters, filter_params, with_positions=True) for term in terms]
+        candidates = set.intersection(*(set(p) for p in term_positions))
+        matched = [user_id for user_id in candidates if _phrase_matches(term_positions, user_id)]
+        idf = math.log1p(total_docs / (len(matched) or 1))
+        # A phrase match is worth more than its words found separately
+        scores = {user_id: 2 * len(terms) * idf for user_id in matched}
+
+    cache[key] = scores
+    return scores
+
+
+def search(query, department=None, approved=None, limit=20, offset=0):
+    """
+    Search students' latest resumes
+
+    Args:
+        query: Query string (see module docstring)
+        department: Only students of this department
+        approved: True/False to filter on HOD approval, None for both
+        limit, offset: Page of the ranked results
+
+    Returns:
+        dict with total and results (user id, name, email, department,
+        is_approved, job_fit_score, score), best match first
+
+    Raises:
+        QueryError: If the query cannot be parsed
+    """
+    groups = parse_query(query)
+    filters, filter_params = _filter_sql(department, approved)
+
+    row = db.execute_query("SELECT COUNT(*) AS count FROM search_documents", fetch_one=True)
+    total_docs = max(row['count'] if row else 0, 1)
+
+    cache = {}
+    scores = {}
+    for group in groups:
+        positive = [c for c in group if not c[2]]
+        negative = [c for c in group if c[2]]
+
+        # Smallest posting list first keeps the intersection cheap
+        clause_scores = sorted(
+            (_clause(field, terms, filters, filter_params, total_docs, cache) for field, terms, _ in positive),
+            key=len
+        )
+        matched = set(clause_scores[0])
+        for other in clause_scores[1:]:
+            matched &= other.keys()
+            if not matched:
+                break
+        for field, terms, _ in negative:
+            if not matched:
+                break
+            matched -= _clause(field, terms, filters, filter_params, total_docs, cache).keys()
+
+        for user_id in matched:
+            score = sum(s[user_id] for s in clause_scores)
+            scores[user_id] = max(scores.get(user_id, 0), score)
+
+    ranked = sorted(scores, key=lambda user_id: (-scores[user_id], user_id))
+    page = ranked[offset:offset + limit]
+
+    results = []
+    if page:
+        placeholders = ', '.join(['%s'] * len(page))
+        rows = db.execute_query(
+            f"""SELECT u.id, u.name, u.email, u.department, u.is_approved, r.job_fit_score
+                FROM users u
+                JOIN search_documents sd ON sd.user_id = u.id
+                LEFT JOIN resumes r ON r.id = sd.resume_id
+                WHERE u.id IN ({placeholders})""",
+            tuple(page),
+            fetch_all=True
+        ) or []
+        by_id = {row['id']: row for row in rows}
+        for user_id in page:
+            if user_id in by_id:
+                result = dict(by_id[user_id])
+                result['is_approved'] = bool(result['is_approved'])
+                result['score'] = round(scores[user_id], 3)
+                results.append(result)
+
+    return {'total': len(ranked), 'results': results}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'rebuild':
+        try:
+            count = rebuild_index()
+            print(f"✓ Indexed {count} resume(s)")
+        finally:
+            db.close()
+    else:
+        print(__doc__)
@@ -0,0 +1,352 @@
+"""
+Offline skill extraction
+
+A skill taxonomy (canonical name -> aliases) is compiled once into a single
+regex built from a character trie, so a resume is scanned in one pass no
+matter how many skills are known. Matches respect token boundaries: "Java"
+does not match inside "JavaScript" and "C" does not match inside "C++".
+
+local_analysis() turns the matches into the same dict analyze_resume()
+returns, which is the zero-cost fallback when Gemini is not configured or
+unavailable.
+
+Extra skills can be added without a code change by pointing SKILLS_FILE at a
+JSON file of the form {"Category": {"Canonical Name": ["alias", ...]}}.
+"""
+import json
+import os
+import re
+from collections import Counter
+
+SKILLS_FILE = os.getenv('SKILLS_FILE')
+
+# Category -> canonical name -> aliases (the canonical name always matches)
+SKILL_TAXONOMY = {
+    'Programming Languages': {
+        'Python': ['python3'],
+        'Java': ['core java', 'java se', 'java ee', 'j2ee'],
+        'JavaScript': ['js', 'ecmascript', 'es6'],
+        'TypeScript': [],
+        'C': ['c language', 'c programming'],
+        'C++': ['cpp', 'c plus plus'],
+        'C#': ['c sharp', 'csharp'],
+        'Go': ['golang'],
+        'Rust': [],
+        'Kotlin': [],
+        'Swift': [],
+        'PHP': [],
+        'Ruby': [],
+        'Scala': [],
+        'R': ['r programming', 'r language'],
+        'MATLAB': [],
+        'Dart': [],
+        'Perl': [],
+        'Shell Scripting': ['bash', 'shell script', 'shell scripting', 'unix shell'],
+        'Verilog': ['vhdl'],
+        'Assembly': ['assembly language'],
+    },
+    'Web Development': {
+        'HTML': ['html5'],
+        'CSS': ['css3'],
+        'React': ['react.js', 'reactjs'],
+        'Angular': ['angular.js', 'angularjs'],
+        'Vue.js': ['vue', 'vuejs'],
+        'Next.js': ['nextjs'],
+        'Node.js': ['nodejs'],
+        'Express.js': ['expressjs'],
+        'Django': [],
+        'Flask': [],
+        'FastAPI': [],
+        'Spring Boot': ['spring framework', 'spring mvc'],
+        'ASP.NET': ['.net', 'dotnet', '.net core'],
+        'Laravel': [],
+        'Bootstrap': [],
+        'Tailwind CSS': ['tailwind'],
+        'jQuery': [],
+        'REST APIs': ['rest api', 'restful', 'restful apis'],
+        'GraphQL': [],
+        'Redux': [],
+    },
+    'Mobile Development': {
+        'Android': ['android development', 'android studio'],
+        'iOS': ['ios development'],
+        'Flutter': [],
+        'React Native': [],
+    },
+    'Databases': {
+        'SQL': [],
+        'MySQL': [],
+        'PostgreSQL': ['postgres'],
+        'MongoDB': ['mongo'],
+        'SQLite': [],
+        'Oracle': ['oracle db', 'pl/sql'],
+        'SQL Server': ['mssql', 'ms sql'],
+        'Redis': [],
+        'Firebase': [],
+        'Cassandra': [],
+        'Elasticsearch': ['elastic search'],
+    },
+    'Data Science & AI': {
+        'Machine Learning': ['ML'],
+        'Deep Learning': [],
+        'Artificial Intelligence': ['AI'],
+        'Natural Language Processing': ['nlp'],
+        'Computer Vision': ['opencv'],
+        'Data Analysis': ['data analytics'],
+        'Data Visualization': [],
+        'Statistics': [],
+        'TensorFlow': [],
+        'PyTorch': [],
+        'Keras': [],
+        'scikit-learn': ['sklearn', 'scikit learn'],
+        'Pandas': [],
+        'NumPy': [],
+        'Matplotlib': [],
+        'Power BI': ['powerbi'],
+        'Tableau': [],
+        'Excel': ['ms excel', 'microsoft excel', 'advanced excel'],
+        'Generative AI': ['genai', 'llm', 'llms', 'large language models'],
+        'Big Data': ['hadoop', 'spark', 'apache spark', 'pyspark'],
+    },
+    'Cloud & DevOps': {
+        'AWS': ['amazon web services'],
+        'Azure': ['microsoft azure'],
+        'Google Cloud': ['gcp', 'google cloud platform'],
+        'Docker': [],
+        'Kubernetes': ['k8s'],
+        'Git': [],
+        'GitHub': [],
+        'Jenkins': [],
+        'CI/CD': ['continuous integration'],
+        'Linux': ['unix', 'ubuntu'],
+        'Terraform': [],
+        'Ansible': [],
+    },
+    'Computer Science': {
+        'Data Structures': ['dsa', 'data structures and algorithms'],
+        'Algorithms': [],
+        'Object-Oriented Programming': ['oop', 'oops', 'object oriented programming'],
+        'Operating Systems': [],
+        'Computer Networks': ['networking'],
+        'DBMS': ['database management systems'],
+        'System Design': [],
+        'Microservices': [],
+        'Cyber Security': ['cybersecurity', 'information security', 'network security'],
+        'Blockchain': [],
+        'Internet of Things': ['iot'],
+        'Embedded Systems': ['embedded c', 'arduino', 'raspberry pi'],
+    },
+    'Testing': {
+        'Software Testing': ['manual testing', 'QA'],
+        'Selenium': [],
+        'JUnit': [],
+        'PyTest': [],
+    },
+    'Engineering Tools': {
+        'AutoCAD': [],
+        'SolidWorks': [],
+        'ANSYS': [],
+        'CATIA': [],
+        'LabVIEW': [],
+        'PLC': ['scada'],
+        'Figma': [],
+    },
+    'Soft Skills': {
+        'Communication': ['communication skills'],
+        'Leadership': [],
+        'Teamwork': ['team work', 'team player'],
+        'Problem Solving': ['problem-solving'],
+        'Time Management': [],
+        'Project Management': ['agile', 'scrum', 'jira'],
+    },
+}
+
+# Names that are also ordinary words or letters only count when written exactly so
+CASE_SENSITIVE = {'C', 'R', 'Go', 'Swift', 'Rust', 'Dart', 'AI', 'ML', 'QA', 'Excel'}
+
+# Characters that continue a token; a match may not be followed or preceded by one
+TOKEN_CHARS = 'a-z0-9+#'
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+
+_matcher = None
+
+
+def load_taxonomy():
+    """Built-in taxonomy merged with SKILLS_FILE, if set"""
+    taxonomy = {category: dict(skills) for category, skills in SKILL_TAXONOMY.items()}
+    if SKILLS_FILE:
+        try:
+            with open(SKILLS_FILE, encoding='utf-8') as f:
+                for category, skills in json.load(f).items():
+                    taxonomy.setdefault(category, {}).update(skills)
+        except (OSError, ValueError) as e:
+            print(f"Error loading skills file {SKILLS_FILE}: {e}")
+    return taxonomy
+
+
+def tokenize(text):
+    """Lowercase word tokens (keeps c++, c#, node.js)"""
+    return TOKEN_PATTERN.findall((text or '').lower())
+
+
+def _normalize(phrase):
+    return ' '.join(phrase.lower().split())
+
+
+def _trie_pattern(node):
+    """Regex for a trie node; shared prefixes are matched once"""
+    end = '' in node
+    branches = []
+    for char in sorted(k for k in node if k):
+        # A space in an alias matches any run of whitespace (line breaks in PDFs)
+        branches.append((r'\s+' if char == ' ' else re.escape(char)) + _trie_pattern(node[char]))
+    if not branches:
+        return ''
+    if len(branches) == 1 and not end:
+        return branches[0]
+    return '(?:' + '|'.join(branches) + ')' + ('?' if end else '')
+
+
+class SkillMatcher:
+    """Taxonomy compiled into one trie-shaped regex"""
+
+    def __init__(self, taxonomy):
+        self.canonical = {}   # normalized alias -> canonical name
+        self.category = {}    # canonical name -> category
+        self.exact = {}       # normalized alias -> the only accepted spelling
+        trie = {}
+        for category, skills in taxonomy.items():
+            for name, aliases in skills.items():
+                self.category[name] = category
+                for alias in [name, *aliases]:
+                    key = _normalize(alias)
+                    if not key or key in self.canonical:
+                        continue
+                    self.canonical[key] = name
+                    if alias in CASE_SENSITIVE:
+                        self.exact[key] = alias
+                    node = trie
+                    for char in key:
+                        node = node.setdefault(char, {})
+                    node[''] = True
+
+        # The trie is greedy-longest by construction, so "c++" wins over "c"
+        # and "node.js" over "node"
+        self.pattern = re.compile(
+            rf'(?<![{TOKEN_CHARS}])({_trie_pattern(trie)})(?![{TOKEN_CHARS}])',
+            re.IGNORECASE
+        )
+
+    def counts(self, text):
+        """Counter of canonical skill -> occurrences, in order of first appearance"""
+        found = Counter()
+        if not text:
+            return found
+        for match in self.pattern.finditer(text):
+            key = _normalize(match.group(1))
+            if key in self.exact and match.group(1) != self.exact[key]:
+                continue
+            name = self.canonical.get(key)
+            if name:
+                found[name] += 1
+        return found
+
+    def extract(self, text, limit=None):
+        """Canonical skills in text, most mentioned first"""
+        found = self.counts(text)
+        skills = sorted(found, key=lambda name: -found[name])
+        return skills[:limit] if limit else skills
+
+
+def get_matcher():
+    """Shared matcher, compiled on first use"""
+    global _matcher
+    if _matcher is None:
+        _matcher = SkillMatcher(load_taxonomy())
+    return _matcher
+
+
+def extract_skills(text, limit=None):
+    return get_matcher().extract(text, limit)
+
+
+def skill_categories(skills):
+    """Group canonical skills by taxonomy category"""
+    matcher = get_matcher()
+    grouped = {}
+    for name in skills:
+        grouped.setdefault(matcher.category.get(name, 'Other'), []).append(name)
+    return grouped
+
+# ==================== Local analysis ====================
+
+DEGREE_PATTERN = re.compile(
+    r'\b(b\.?\s?tech|b\.?\s?e|m\.?\s?tech|m\.?\s?e|mca|bca|mba|b\.?\s?sc|m\.?\s?sc|b\.?\s?com|'
+    r'ph\.?\s?d|bachelor(?:\'s)? of [a-z ]+|master(?:\'s)? of [a-z ]+|diploma in [a-z ]+)\b',
+    re.IGNORECASE
+)
+CGPA_PATTERN = re.compile(r'\b(?:cgpa|gpa|sgpa)\s*[:\-]?\s*(\d{1,2}(?:\.\d{1,2})?)', re.IGNORECASE)
+YEARS_PATTERN = re.compile(r'\b(\d{1,2})\+?\s*(?:years?|yrs?)\b(?:\s+of)?\s+experience', re.IGNORECASE)
+EXPERIENCE_PATTERN = re.compile(r'\b(internships?|intern|work experience|employment|projects?)\b', re.IGNORECASE)
+
+
+def _education_summary(text):
+    degrees = []
+    for match in DEGREE_PATTERN.finditer(text):
+        degree = ' '.join(match.group(1).split())
+        if degree.lower() not in (d.lower() for d in degrees):
+            degrees.append(degree)
+    if not degrees:
+        return 'Not specified'
+    summary = ', '.join(degrees[:3])
+    cgpa = CGPA_PATTERN.search(text)
+    if cgpa:
+        summary += f' (CGPA {cgpa.group(1)})'
+    return summary
+
+
+def _experience_summary(text):
+    years = YEARS_PATTERN.search(text)
+    if years:
+        return f'{years.group(1)} year(s) of experience mentioned'
+    mentions = Counter(m.group(1).lower().rstrip('s') for m in EXPERIENCE_PATTERN.finditer(text))
+    if not mentions:
+        return 'Not specified'
+    return 'Mentions ' + ', '.join(f'{name} ({count})' for name, count in mentions.most_common(3))
+
+
+def local_analysis(resume_text, job_role, job_description=''):
+    """
+    Offline resume analysis with the same keys as analyze_resume()
+
+    job_fit_score is the share of skills named in the job role/description
+    that the resume mentions; without any, it grows with the number of
+    skills found.
+    """
+    matcher = get_matcher()
+    resume_skills = matcher.extract(resume_text)
+    required = matcher.extract(f"{job_role}\n{job_description or ''}")
+
+    have = set(resume_skills)
+    missing = [skill for skill in required if skill not in have]
+    if required:
+        score = round(100 * (len(required) - len(missing)) / len(required))
+    else:
+        score = min(100, 40 + 5 * len(resume_skills)) if resume_skills else 0
+
+    if missing:
+        suggestions = f"Consider adding experience with: {', '.join(missing[:8])}."
+    elif resume_skills:
+        suggestions = 'Your resume covers the key skills found. Add measurable results to your projects.'
+    else:
+        suggestions = 'No recognizable skills found. List your technical skills in a dedicated section.'
+
+    return {
+        'skills': resume_skills[:15],
+        'education': _education_summary(resume_text or ''),
+        'experience': _experience_summary(resume_text or ''),
+        'job_fit_score': score,
+        'suggestions': suggestions + ' (Offline analysis)',
+        'source': 'local'
+    }
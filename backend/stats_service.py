@@ -0,0 +1,220 @@
+"""
+Dashboard statistics
+
+All counters for a dashboard come from one conditional-aggregation query.
+With PLACEMENT_STATS_TABLE=True they are instead read from the
+placement_stats summary table, which the write routes keep current with
+the record_* functions and remove_student below (call them inside the same
+db.transaction() as the write they describe).
+
+Usage:
+    python stats_service.py rebuild   # recompute placement_stats from scratch
+"""
+import os
+import sys
+from pathlib import Path
+
+# Add backend directory to path
+backend_dir = Path(__file__).parent
+sys.path.insert(0, str(backend_dir))
+
+from database import db
+
+USE_SUMMARY_TABLE = os.getenv('PLACEMENT_STATS_TABLE', 'False').lower() == 'true'
+
+GLOBAL_SCOPE = 'global'
+
+TPO_STATS_QUERY = """
+    SELECT u.total_students, d.total_drives, d.active_drives, a.total_applications, a.selected_count
+    FROM (SELECT COUNT(*) AS total_students FROM users WHERE role = 'student') u
+    CROSS JOIN (SELECT COUNT(*) AS total_drives,
+                       COALESCE(SUM(status = 'active' AND last_date >= CURDATE()), 0) AS active_drives
+                FROM drives) d
+    CROSS JOIN (SELECT COUNT(*) AS total_applications,
+                       COALESCE(SUM(status = 'Selected'), 0) AS selected_count
+                FROM applications) a
+"""
+
+HOD_STATS_QUERY = """
+    SELECT COUNT(*) AS total_students,
+           COALESCE(SUM(is_approved), 0) AS approved_students
+    FROM users
+    WHERE role = 'student' AND department = %s
+"""
+
+# Active drives depend on CURDATE(), so they are always counted live (index-only)
+TPO_SUMMARY_QUERY = """
+    SELECT ps.total_students, ps.total_drives, ps.total_applications, ps.selected_count,
+           (SELECT COUNT(*) FROM drives WHERE status = 'active' AND last_date >= CURDATE()) AS active_drives
+    FROM placement_stats ps
+    WHERE ps.scope = %s
+"""
+
+HOD_SUMMARY_QUERY = """
+    SELECT total_students, approved_students
+    FROM placement_stats
+    WHERE scope = %s
+"""
+
+TPO_FIELDS = ('total_students', 'total_drives', 'active_drives', 'total_applications', 'selected_count')
+HOD_FIELDS = ('total_students', 'approved_students')
+
+
+def department_scope(department):
+    return f"dept:{department or ''}"
+
+
+def _as_ints(row, fields):
+    # SUM() comes back as Decimal
+    return {field: int(row[field] or 0) if row else 0 for field in fields}
+
+
+def get_tpo_stats():
+    """Counters for the TPO dashboard"""
+    if USE_SUMMARY_TABLE:
+        row = db.execute_query(TPO_SUMMARY_QUERY, (GLOBAL_SCOPE,), fetch_one=True)
+        if row:
+            return _as_ints(row, TPO_FIELDS)
+    row = db.execute_query(TPO_STATS_QUERY, fetch_one=True)
+    return _as_ints(row, TPO_FIELDS)
+
+
+def get_hod_stats(department):
+    """Counters for one department's HOD dashboard"""
+    if USE_SUMMARY_TABLE:
+        row = db.execute_query(HOD_SUMMARY_QUERY, (department_scope(department),), fetch_one=True)
+        if row:
+            return _as_ints(row, HOD_FIELDS)
+    row = db.execute_query(HOD_STATS_QUERY, (department,), fetch_one=True)
+    return _as_ints(row, HOD_FIELDS)
+
+
+# ==================== Summary table maintenance ====================
+
+def rebuild_stats():
+    """Recompute every row of placement_stats from the base tables"""
+    with db.transaction():
+        db.execute_query("DELETE FROM placement_stats")
+        db.execute_query(
+            """INSERT INTO placement_stats (scope, total_students, approved_students)
+               SELECT CONCAT('dept:', COALESCE(department, '')), COUNT(*), COALESCE(SUM(is_approved), 0)
+               FROM users
+               WHERE role = 'student'
+               GROUP BY COALESCE(department, '')"""
+        )
+        db.execute_query(
+            """INSERT INTO placement_stats
+                    (scope, total_students, approved_students, total_drives, total_applications, selected_count)
+                SELECT %s, s.total_students, s.approved_students, d.total_drives,
+                       a.total_applications, a.selected_count
+                FROM (SELECT COUNT(*) AS total_students, COALESCE(SUM(is_approved), 0) AS approved_students
+                      FROM users WHERE role = 'student') s
+                CROSS JOIN (SELECT COUNT(*) AS total_drives FROM drives) d
+                CROSS JOIN (SELECT COUNT(*) AS total_applications,
+                                   COALESCE(SUM(status = 'Selected'), 0) AS selected_count
+                            FROM applications) a""",
+            (GLOBAL_SCOPE,)
+        )
+
+
+def _apply_deltas(scope, **deltas):
+    """
+    Add deltas to one scope's row
+
+    Returns:
+        True if the row was missing and every row was recomputed instead (the
+        write being recorded must already be done; skip any further deltas)
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return False
+    assignments = ', '.join(f"{field} = {field} + %s" for field in deltas)
+    updated = db.execute_query(
+        f"UPDATE placement_stats SET {assignments} WHERE scope = %s",
+        (*deltas.values(), scope)
+    )
+    if not updated:
+        # Row missing (table never built or new department): recompute everything
+        rebuild_stats()
+        return True
+    return False
+
+
+def _apply_student_deltas(department, global_deltas, department_deltas):
+    # A rebuild of the global row already counted the change everywhere
+    if not _apply_deltas(GLOBAL_SCOPE, **global_deltas):
+        _apply_deltas(department_scope(department), **department_deltas)
+
+
+def record_student_registered(department):
+    if USE_SUMMARY_TABLE:
+        _apply_student_deltas(department, {'total_students': 1}, {'total_students': 1})
+
+
+def record_student_approved(department):
+    """department: the approved student's department"""
+    if USE_SUMMARY_TABLE:
+        _apply_student_deltas(department, {'approved_students': 1}, {'approved_students': 1})
+
+
+def remove_student(student_id):
+    """
+    Delete a student and update the counters; their applications go with them
+    (ON DELETE CASCADE). Call inside the caller's db.transaction().
+
+    Returns:
+        Number of users deleted (0 or 1)
+    """
+    student = None
+    if USE_SUMMARY_TABLE:
+        student = db.execute_query(
+            """SELECT u.department, u.is_approved,
+                      COUNT(a.id) AS applications,
+                      COALESCE(SUM(a.status = 'Selected'), 0) AS selected
+               FROM users u
+               LEFT JOIN applications a ON a.student_id = u.id
+               WHERE u.id = %s AND u.role = 'student'
+               GROUP BY u.id, u.department, u.is_approved""",
+            (student_id,),
+            fetch_one=True
+        )
+    deleted = db.execute_query(
+        "DELETE FROM users WHERE id = %s AND role = 'student'",
+        (student_id,)
+    )
+    # Deltas (or a rebuild, if a row is missing) only after the DELETE, so a
+    # rebuild does not count the student being removed
+    if student and deleted:
+        approved = -1 if student['is_approved'] else 0
+        _apply_student_deltas(
+            student['department'],
+            {'total_students': -1, 'approved_students': approved,
+             'total_applications': -int(student['applications']), 'selected_count': -int(student['selected'])},
+            {'total_students': -1, 'approved_students': approved}
+        )
+    return deleted
+
+
+def record_drive_created():
+    if USE_SUMMARY_TABLE:
+        _apply_deltas(GLOBAL_SCOPE, total_drives=1)
+
+
+def record_application_created():
+    if USE_SUMMARY_TABLE:
+        _apply_deltas(GLOBAL_SCOPE, total_applications=1)
+
+
+def record_status_changed(old_status, new_status, count=1):
+    if USE_SUMMARY_TABLE and old_status != new_status:
+        delta = (new_status == 'Selected') - (old_status == 'Selected')
+        _apply_deltas(GLOBAL_SCOPE, selected_count=delta * count)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'rebuild':
+        rebuild_stats()
+        print("✓ placement_stats rebuilt")
+        db.close()
+    else:
+        print(__doc__)
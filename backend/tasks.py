@@ -0,0 +1,109 @@
+"""
+Background job handlers
+"""
+import json
+import os
+
+from database import db
+from analysis_cache import cached_analysis
+from jobs import job_handler
+import report_cache
+from resume_texts import get_resume_text, load_text
+from search_index import index_resume, unindex_resume
+from skills import local_analysis
+
+ANALYSIS_CONCURRENCY = int(os.getenv('ANALYSIS_CONCURRENCY', 2))
+
+
+def mark_analysis_failed(payload, error):
+    """
+    Dead-letter callback: Gemini kept failing, so store the offline analysis
+    of the extracted text, or show the student that the analysis did not complete
+    """
+    resume = db.execute_query(
+        "SELECT user_id, content_hash FROM resumes WHERE id = %s",
+        (payload['resume_id'],),
+        fetch_one=True
+    )
+    resume_text = load_text(resume['content_hash']) if resume and resume['content_hash'] else None
+    if resume_text:
+        analysis = local_analysis(resume_text, "General")
+        with db.transaction():
+            db.execute_query(
+                "UPDATE resumes SET analysis_status = 'done', job_fit_score = %s, feedback = %s WHERE id = %s",
+                (analysis['job_fit_score'], json.dumps(analysis), payload['resume_id'])
+            )
+            index_resume(resume['user_id'], payload['resume_id'], resume['content_hash'], resume_text, analysis)
+        return
+
+    feedback = {
+        'skills': [],
+        'education': 'Analysis failed',
+        'experience': 'Analysis failed',
+        'job_fit_score': 0,
+        'suggestions': 'We could not analyze your resume right now. Please try uploading it again later.'
+    }
+    with db.transaction():
+        db.execute_query(
+            "UPDATE resumes SET analysis_status = 'failed', feedback = %s WHERE id = %s",
+            (json.dumps(feedback), payload['resume_id'])
+        )
+        if resume:
+            unindex_resume(resume['user_id'], payload['resume_id'])
+
+
+@job_handler('analyze_resume', max_concurrency=ANALYSIS_CONCURRENCY, on_dead=mark_analysis_failed)
+def analyze_uploaded_resume(payload):
+    """Extract text from an uploaded resume and score it with Gemini"""
+    resume = db.execute_query(
+        "SELECT id, user_id, file_path, content_hash FROM resumes WHERE id = %s",
+        (payload['resume_id'],),
+        fetch_one=True
+    )
+    if not resume:
+        return
+
+    resume_text = get_resume_text(resume)
+    if not resume_text:
+        feedback = {
+            'skills': [],
+            'education': 'Not analyzed',
+            'experience': 'Not analyzed',
+            'job_fit_score': 0,
+            'suggestions': 'Could not extract text from resume. Please ensure the file is not corrupted.'
+        }
+        with db.transaction():
+            db.execute_query(
+                "UPDATE resumes SET analysis_status = 'failed', feedback = %s WHERE id = %s",
+                (json.dumps(feedback), resume['id'])
+            )
+            unindex_resume(resume['user_id'], resume['id'])
+            db.execute_query(
+                "INSERT INTO notifications (user_id, message, type) VALUES (%s, %s, %s)",
+                (resume['user_id'], "We could not read your resume. Please upload a different file.", 'error')
+            )
+        return
+
+    # Analyze with Gemini (basic analysis for now); errors propagate so the job is retried
+    analysis = cached_analysis(resume, "General", raise_errors=True)
+
+    with db.transaction():
+        db.execute_query(
+            "UPDATE resumes SET analysis_status = 'done', job_fit_score = %s, feedback = %s WHERE id = %s",
+            (analysis.get('job_fit_score', 0), json.dumps(analysis), resume['id'])
+        )
+        # Keep the TPO search index on the student's latest resume
+        index_resume(resume['user_id'], resume['id'], resume['content_hash'], resume_text, analysis)
+        db.execute_query(
+            "INSERT INTO notifications (user_id, message, type) VALUES (%s, %s, %s)",
+            (resume['user_id'], "Your resume analysis is ready.", 'success')
+        )
+
+
+@job_handler('refresh_reports', max_concurrency=1)
+def refresh_reports(payload):
+    """Rebuild stale cached report exports, then schedule the next run"""
+    try:
+        report_cache.refresh_stale()
+    finally:
+        report_cache.schedule_refresh(delay=report_cache.REPORT_REFRESH_INTERVAL)
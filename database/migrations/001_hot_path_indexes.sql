@@ -0,0 +1,25 @@
+-- Indexes for the queries behind the dashboards
+
+-- Student dashboard: unread notifications, newest first
+CREATE INDEX idx_notifications_user_unread ON notifications (user_id, is_read, created_at);
+
+-- Student dashboard / TPO stats: active drives by closing date
+CREATE INDEX idx_drives_status_last_date ON drives (status, last_date);
+
+-- TPO dashboard: most recent drives
+CREATE INDEX idx_drives_created_at ON drives (created_at);
+
+-- HOD dashboard: students by department and approval state
+CREATE INDEX idx_users_role_dept_approved ON users (role, department, is_approved);
+
+-- HOD dashboard: department applications join
+CREATE INDEX idx_users_department ON users (department);
+
+-- TPO / HOD dashboards: most recent applications
+CREATE INDEX idx_applications_applied_at ON applications (applied_at);
+
+-- Student dashboard: own applications, newest first
+CREATE INDEX idx_applications_student_applied ON applications (student_id, applied_at);
+
+-- Student dashboard / resume analysis: latest resume
+CREATE INDEX idx_resumes_user_analyzed ON resumes (user_id, analyzed_at);
@@ -0,0 +1,14 @@
+-- Dashboard counters kept up to date incrementally (see backend/stats_service.py)
+CREATE TABLE IF NOT EXISTS placement_stats (
+    scope VARCHAR(150) PRIMARY KEY,
+    total_students INT NOT NULL DEFAULT 0,
+    approved_students INT NOT NULL DEFAULT 0,
+    total_drives INT NOT NULL DEFAULT 0,
+    total_applications INT NOT NULL DEFAULT 0,
+    selected_count INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- TPO counters: selected applications are counted from this index instead of the table
+-- (applied_at also serves the status filter of keyset pagination, see 003)
+CREATE INDEX idx_applications_status_applied ON applications (status, applied_at);
@@ -0,0 +1,9 @@
+-- Keyset pagination for /api/applications and /api/drives: (filter column, sort key)
+
+-- The status filter uses idx_applications_status_applied from 002
+
+-- Per-drive applicant lists
+CREATE INDEX idx_applications_drive_applied ON applications (drive_id, applied_at);
+
+-- Drives filtered by status, newest first
+CREATE INDEX idx_drives_status_created ON drives (status, created_at);
@@ -0,0 +1,19 @@
+-- Background job queue (see backend/jobs.py)
+CREATE TABLE IF NOT EXISTS jobs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    job_type VARCHAR(50) NOT NULL,
+    payload TEXT NOT NULL,
+    status ENUM('queued','running','done','dead') DEFAULT 'queued',
+    attempts INT NOT NULL DEFAULT 0,
+    max_attempts INT NOT NULL DEFAULT 3,
+    run_after TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    locked_by VARCHAR(100),
+    locked_at TIMESTAMP NULL,
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_jobs_status_run_after (status, run_after)
+);
+
+-- Resume analysis now runs in the background; existing rows are already analyzed
+ALTER TABLE resumes ADD COLUMN analysis_status ENUM('pending','done','failed') NOT NULL DEFAULT 'done';
@@ -0,0 +1,11 @@
+-- Extracted resume text, stored once per distinct file (see backend/resume_texts.py)
+CREATE TABLE IF NOT EXISTS resume_texts (
+    content_hash CHAR(64) PRIMARY KEY,
+    text MEDIUMTEXT NOT NULL,
+    page_count INT NOT NULL DEFAULT 0,
+    extractor_version INT NOT NULL DEFAULT 1,
+    extracted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE resumes ADD COLUMN content_hash CHAR(64) NULL;
+CREATE INDEX idx_resumes_content_hash ON resumes (content_hash);
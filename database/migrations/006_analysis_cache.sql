@@ -0,0 +1,13 @@
+-- Memoized Gemini resume analyses (see backend/analysis_cache.py)
+CREATE TABLE IF NOT EXISTS analysis_cache (
+    cache_key CHAR(64) PRIMARY KEY,
+    resume_hash CHAR(64) NOT NULL,
+    drive_id INT NULL,
+    result TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL,
+    INDEX idx_analysis_cache_resume (resume_hash),
+    INDEX idx_analysis_cache_drive (drive_id),
+    INDEX idx_analysis_cache_last_used (last_used_at)
+);
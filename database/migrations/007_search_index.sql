@@ -0,0 +1,23 @@
+-- Inverted index over resume text and skills (see backend/search_index.py)
+-- One document per student: the latest analyzed resume
+CREATE TABLE IF NOT EXISTS search_documents (
+    user_id INT PRIMARY KEY,
+    resume_id INT NOT NULL,
+    content_hash CHAR(64) NULL,
+    token_count INT NOT NULL DEFAULT 0,
+    indexed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+-- field: 'text' = resume words (with token positions for phrase queries),
+--        'skill' = canonical skill names from the analysis and the skill parser
+CREATE TABLE IF NOT EXISTS search_postings (
+    term VARCHAR(64) NOT NULL,
+    field ENUM('text','skill') NOT NULL,
+    user_id INT NOT NULL,
+    tf SMALLINT UNSIGNED NOT NULL,
+    positions MEDIUMTEXT NULL,
+    PRIMARY KEY (term, field, user_id),
+    INDEX idx_search_postings_user (user_id),
+    FOREIGN KEY(user_id) REFERENCES users(id) ON DELETE CASCADE
+);
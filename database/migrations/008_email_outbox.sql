@@ -0,0 +1,22 @@
+-- Outgoing email queue drained by the background sender (see backend/mail_outbox.py)
+-- Rows with a template and no body are rendered by the sender, outside the request
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    recipient VARCHAR(255) NOT NULL,
+    subject VARCHAR(255) NULL,
+    body MEDIUMTEXT NULL,
+    html_body MEDIUMTEXT NULL,
+    template VARCHAR(50) NULL,
+    context TEXT NULL,
+    attachments TEXT NULL,
+    status ENUM('queued','sending','sent','dead') DEFAULT 'queued',
+    attempts INT NOT NULL DEFAULT 0,
+    max_attempts INT NOT NULL DEFAULT 5,
+    send_after TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    locked_by VARCHAR(100),
+    locked_at TIMESTAMP NULL,
+    last_error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMP NULL,
+    INDEX idx_email_outbox_status_send_after (status, send_after)
+);
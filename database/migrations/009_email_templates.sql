@@ -0,0 +1,12 @@
+-- Generated email templates, one per (email type, company, role, version)
+-- (see backend/email_templates.py)
+CREATE TABLE IF NOT EXISTS email_templates (
+    template_key CHAR(64) PRIMARY KEY,
+    email_type VARCHAR(20) NOT NULL,
+    company_name VARCHAR(100) NOT NULL,
+    job_role VARCHAR(100) NOT NULL,
+    version INT NOT NULL,
+    subject VARCHAR(255) NOT NULL,
+    body TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,10 @@
+-- Data-version stamp for cached reports (see backend/report_cache.py):
+-- every table a report reads carries an indexed updated_at, so the stamp is
+-- a handful of index lookups (deletes are counted by 013)
+
+ALTER TABLE users ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP;
+ALTER TABLE drives ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP;
+
+CREATE INDEX idx_users_updated_at ON users (updated_at);
+CREATE INDEX idx_drives_updated_at ON drives (updated_at);
+CREATE INDEX idx_applications_updated_at ON applications (updated_at);
@@ -0,0 +1,8 @@
+-- One sender at a time drains the email outbox, so MAIL_RATE_PER_MINUTE holds
+-- across all processes (see backend/mail_outbox.py)
+CREATE TABLE IF NOT EXISTS email_outbox_lease (
+    id TINYINT PRIMARY KEY,
+    holder VARCHAR(100) NULL,
+    expires_at TIMESTAMP NULL
+);
+INSERT IGNORE INTO email_outbox_lease (id, holder, expires_at) VALUES (1, NULL, NULL);
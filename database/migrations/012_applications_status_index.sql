@@ -0,0 +1,6 @@
+-- Databases that applied the earlier 002 have idx_applications_status, and
+-- the composite index only if they also applied the earlier 003. Bring them
+-- in line with the current 002 (errors for an index that already exists or
+-- is already gone are skipped by the runner).
+CREATE INDEX idx_applications_status_applied ON applications (status, applied_at);
+DROP INDEX idx_applications_status ON applications;
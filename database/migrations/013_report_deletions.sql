@@ -0,0 +1,8 @@
+-- Deletes leave no updated_at behind, so routes that delete report rows bump
+-- this counter, which is part of the cached reports' data version (see
+-- backend/report_cache.py). A no-op where an earlier 010 already created it.
+CREATE TABLE IF NOT EXISTS report_data_version (
+    id TINYINT PRIMARY KEY,
+    deletions BIGINT NOT NULL DEFAULT 0
+);
+INSERT IGNORE INTO report_data_version (id, deletions) VALUES (1, 0);
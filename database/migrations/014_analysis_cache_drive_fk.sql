@@ -0,0 +1,5 @@
+-- Cached analyses of a deleted drive go with it (see backend/analysis_cache.py).
+-- Rows of drives deleted before this migration would block the foreign key.
+DELETE FROM analysis_cache WHERE drive_id IS NOT NULL AND drive_id NOT IN (SELECT id FROM drives);
+ALTER TABLE analysis_cache
+    ADD CONSTRAINT fk_analysis_cache_drive FOREIGN KEY (drive_id) REFERENCES drives(id) ON DELETE CASCADE;